@@ -0,0 +1,280 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Banc d'essai de la compression sur des corpus générés: débit de chaque étape,
+taux de compression et pic de mémoire (tracemalloc), écrits en JSON et comparés
+à une référence enregistrée.
+
+Usage: python -m benchmarks.compression [--taille 4M] [--grand 256M] [--sortie r.json]
+                                        [--reference base.json] [--echantillonnage 0.01]
+                                        [corpus ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from huff import taille
+from huffman import huffman
+
+TAILLE_MOTIF_MAX = 1 << 23
+ETAPES = ("statistiques", "arbre_de_huffman", "code_binaire", "compresser", "decompresser")
+
+def uniforme(taille_corpus: int, generateur: random.Random) -> bytes:
+    """Octets uniformément aléatoires"""
+    return generateur.randbytes(taille_corpus)
+
+def zipf(taille_corpus: int, generateur: random.Random) -> bytes:
+    """Octets dont la fréquence suit une loi de Zipf (rang 1 le plus fréquent)"""
+    poids = [1/(rang+1) for rang in range(256)]
+    octets = list(range(256))
+    generateur.shuffle(octets)
+    return bytes(generateur.choices(octets, poids, k=taille_corpus))
+
+def texte(taille_corpus: int, generateur: random.Random) -> bytes:
+    """Texte de mots tirés selon une loi de Zipf, avec ponctuation et retours à la ligne"""
+    lettres = "etaoinsrhldcumfpgwybvkxjqz"
+    vocabulaire = ["".join(generateur.choices(lettres, [26-i for i in range(26)],
+                                              k=generateur.randint(1, 10)))
+                   for _ in range(5000)]
+    poids = [1/(rang+1) for rang in range(len(vocabulaire))]
+    morceaux = []
+    total = 0
+    while total < taille_corpus:
+        phrase = " ".join(generateur.choices(vocabulaire, poids, k=generateur.randint(4, 20)))
+        phrase = phrase.capitalize() + generateur.choice([". ", ", ", ".\n", "?\n"])
+        morceaux.append(phrase)
+        total += len(phrase)
+    return "".join(morceaux).encode("ascii")[:taille_corpus]
+
+def symbole_unique(taille_corpus: int, generateur: random.Random) -> bytes:
+    """Un seul octet répété"""
+    return b"a"*taille_corpus
+
+def vide(taille_corpus: int, generateur: random.Random) -> bytes:
+    """Aucun octet"""
+    return b""
+
+CORPUS = {"uniforme": uniforme, "zipf": zipf, "texte": texte,
+          "symbole_unique": symbole_unique, "vide": vide}
+
+def generer(nom: str, taille_corpus: int, graine: int = 0) -> bytes:
+    """
+    Fonction qui génère un corpus de façon reproductible. Au-delà de TAILLE_MOTIF_MAX,
+    un motif de cette taille est répété, pour que les grands corpus restent rapides à créer.
+    """
+    motif = CORPUS[nom](min(taille_corpus, TAILLE_MOTIF_MAX), random.Random(graine))
+    if 0 < len(motif) < taille_corpus:
+        motif = (motif*(taille_corpus//len(motif)+1))[:taille_corpus]
+    return motif
+
+def mesurer(fonction, memoire: bool) -> (float, int, object):
+    """
+    Fonction qui exécute fonction et retourne sa durée, le pic de mémoire allouée
+    (None sans memoire) et son résultat. Le pic est mesuré par une seconde exécution,
+    tracemalloc ralentissant trop le code pour le chronométrer.
+    """
+    debut = time.perf_counter()
+    resultat = fonction()
+    duree = time.perf_counter() - debut
+    pic = None
+    if memoire:
+        tracemalloc.start()
+        try:
+            fonction()
+            pic = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return (duree, pic, resultat)
+
+def banc(donnees: bytes, dossier: str, memoire: bool = True, echantillonnage: float = None) -> dict:
+    """
+    Fonction qui mesure chaque étape sur un corpus. Les fichiers sont dans dossier, pour
+    que compresser et decompresser suivent le chemin des fichiers ordinaires (projection
+    en mémoire). Les étapes sans objet (arbre d'un corpus vide) valent None.
+    Avec echantillonnage, les statistiques échantillonnées et la compression qui les
+    utilise sont aussi mesurées, avec la perte de taux et le gain de temps.
+    """
+    nom_source = os.path.join(dossier, "source")
+    nom_compresse = os.path.join(dossier, "compresse")
+    nom_sortie = os.path.join(dossier, "sortie")
+    with open(nom_source, "wb") as fichier:
+        fichier.write(donnees)
+    taille_mo = len(donnees)/(1 << 20)
+
+    def statistiques():
+        with open(nom_source, "rb") as source:
+            return huffman.statistiques(source)[0]
+
+    def compresser(**options):
+        with open(nom_source, "rb") as source, open(nom_compresse, "w+b") as destination:
+            for _ in huffman.compresser(destination, source, **options):
+                pass
+
+    def decompresser():
+        with open(nom_compresse, "rb") as source, open(nom_sortie, "w+b") as destination:
+            for _ in huffman.decompresser(destination, source):
+                pass
+
+    etapes = {}
+
+    def etape(nom, fonction, debit=True):
+        (duree, pic, resultat) = mesurer(fonction, memoire)
+        etapes[nom] = {"secondes": duree, "pic_memoire": pic,
+                       "mo_s": taille_mo/duree if debit and duree > 0 and donnees else None}
+        return resultat
+
+    stats = etape("statistiques", statistiques)
+    if stats.elements:
+        arbre = etape("arbre_de_huffman", lambda: huffman.arbre_de_huffman(stats), False)
+        etape("code_binaire", lambda: huffman.code_binaire(arbre), False)
+    else:
+        etapes["arbre_de_huffman"] = etapes["code_binaire"] = None
+    etape("compresser", compresser)
+    etape("decompresser", decompresser)
+    taille_compressee = os.path.getsize(nom_compresse)
+    with open(nom_sortie, "rb") as sortie:
+        if sortie.read() != donnees:
+            raise AssertionError("La décompression ne redonne pas le corpus")
+    resultat = {"taille": len(donnees), "taille_compressee": taille_compressee,
+                "ratio": taille_compressee/len(donnees) if donnees else None, "etapes": etapes}
+    if echantillonnage is not None:
+        def statistiques_echantillonnees():
+            with open(nom_source, "rb") as source:
+                return huffman.statistiques_echantillonnees(source, echantillonnage)[0]
+        etape("statistiques_echantillonnees", statistiques_echantillonnees)
+        etape("compresser_echantillonne", lambda: compresser(echantillonnage=echantillonnage))
+        etape("decompresser_echantillonne", decompresser)
+        with open(nom_sortie, "rb") as sortie:
+            if sortie.read() != donnees:
+                raise AssertionError("La décompression échantillonnée ne redonne pas le corpus")
+        taille_echantillonnee = os.path.getsize(nom_compresse)
+        ratio = taille_echantillonnee/len(donnees) if donnees else None
+        resultat["echantillonnage"] = {
+            "fraction": echantillonnage, "taille_compressee": taille_echantillonnee,
+            "ratio": ratio,
+            "perte_ratio": ratio - resultat["ratio"] if donnees else None,
+            "gain_statistiques": (etapes["statistiques"]["secondes"]
+                                  /etapes["statistiques_echantillonnees"]["secondes"]
+                                  if etapes["statistiques_echantillonnees"]["secondes"] > 0 else None),
+            "gain_compression": (etapes["compresser"]["secondes"]
+                                 /etapes["compresser_echantillonne"]["secondes"]
+                                 if etapes["compresser_echantillonne"]["secondes"] > 0 else None)}
+    return resultat
+
+def comparer(resultats: dict, reference: dict, seuil: float) -> [str]:
+    """
+    Fonction qui retourne les régressions par rapport à la référence: une étape plus
+    lente de plus de seuil (fraction), ou un taux de compression moins bon
+    """
+    regressions = []
+    for nom, resultat in resultats["corpus"].items():
+        ancien = reference.get("corpus", {}).get(nom)
+        if ancien is None or ancien["taille"] != resultat["taille"]:
+            continue
+        if resultat["ratio"] is not None and resultat["ratio"] > ancien["ratio"]*(1+1e-9):
+            regressions.append("%s: taux %.4f au lieu de %.4f" %(nom, resultat["ratio"], ancien["ratio"]))
+        for etape, mesure in resultat["etapes"].items():
+            avant = ancien["etapes"].get(etape)
+            if mesure is None or avant is None:
+                continue
+            if mesure["secondes"] > avant["secondes"]*(1+seuil) and mesure["secondes"] > 0.01:
+                regressions.append("%s/%s: %.3f s au lieu de %.3f s (+%.0f%%)"
+                                   %(nom, etape, mesure["secondes"], avant["secondes"],
+                                     100*(mesure["secondes"]/avant["secondes"]-1)))
+    return regressions
+
+def afficher(resultats: dict, sortie=sys.stdout):
+    """
+    Affiche un tableau des résultats
+    """
+    print("%-15s %10s %8s %s" %("corpus", "taille", "taux",
+                                " ".join("%16s" %e for e in ETAPES)), file=sortie)
+    for nom, resultat in resultats["corpus"].items():
+        cellules = []
+        for etape in ETAPES:
+            mesure = resultat["etapes"][etape]
+            if mesure is None:
+                cellules.append("%16s" %"-")
+            elif mesure["mo_s"] is None:
+                cellules.append("%14.2fms" %(1000*mesure["secondes"]))
+            else:
+                cellules.append("%11.2f MB/s" %mesure["mo_s"])
+        ratio = "%8.4f" %resultat["ratio"] if resultat["ratio"] is not None else "%8s" %"-"
+        print("%-15s %10d %s %s" %(nom, resultat["taille"], ratio, " ".join(cellules)), file=sortie)
+    echantillonnes = {nom: resultat["echantillonnage"] for nom, resultat in resultats["corpus"].items()
+                      if "echantillonnage" in resultat}
+    if not echantillonnes:
+        return
+    print(file=sortie)
+    print("%-15s %9s %8s %10s %16s %16s" %("corpus", "fraction", "taux", "perte",
+                                            "statistiques", "compresser"), file=sortie)
+    for nom, mesure in echantillonnes.items():
+        if mesure["ratio"] is None:
+            print("%-15s %9g %8s %10s %16s %16s" %(nom, mesure["fraction"], "-", "-", "-", "-"),
+                  file=sortie)
+            continue
+        gains = ["%15.1fx" %gain if gain is not None else "%16s" %"-"
+                 for gain in (mesure["gain_statistiques"], mesure["gain_compression"])]
+        print("%-15s %9g %8.4f %+10.4f %s" %(nom, mesure["fraction"], mesure["ratio"],
+                                             mesure["perte_ratio"], " ".join(gains)), file=sortie)
+
+def main():
+    """
+    Lance le banc d'essai sur les corpus demandés
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", nargs="*", default=list(CORPUS) + ["grand"],
+                        help="corpus à mesurer parmi %s et grand" %", ".join(CORPUS))
+    parser.add_argument("--taille", type=taille, default=1 << 22, help="taille des corpus (4M)")
+    parser.add_argument("--grand", type=taille, default=0,
+                        help="taille du corpus texte grand, par exemple 256M (0: pas mesuré)")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--sans-memoire", action="store_true",
+                        help="ne mesure pas le pic de mémoire (deux fois plus rapide)")
+    parser.add_argument("--sortie", help="fichier JSON des résultats")
+    parser.add_argument("--reference", help="fichier JSON d'une exécution précédente")
+    parser.add_argument("--echantillonnage", type=float, default=None, metavar="FRACTION",
+                        help="mesure aussi les statistiques échantillonnées sur cette fraction")
+    parser.add_argument("--seuil", type=float, default=0.2,
+                        help="ralentissement toléré par rapport à la référence (0.2: 20%%)")
+    args = parser.parse_args()
+
+    resultats = {"python": platform.python_version(), "machine": platform.machine(),
+                 "numpy": numpy is not None, "corpus": {}}
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom in args.corpus:
+            if nom == "grand":
+                if not args.grand:
+                    continue
+                donnees = generer("texte", args.grand, args.graine)
+            else:
+                donnees = generer(nom, args.taille, args.graine)
+            print("Corpus %s (%d octets)" %(nom, len(donnees)), file=sys.stderr)
+            resultats["corpus"][nom] = banc(donnees, dossier, not args.sans_memoire,
+                                          args.echantillonnage)
+            del donnees
+    afficher(resultats)
+    if args.sortie:
+        with open(args.sortie, "w") as fichier:
+            json.dump(resultats, fichier, indent=2)
+    if args.reference:
+        with open(args.reference) as fichier:
+            regressions = comparer(resultats, json.load(fichier), args.seuil)
+        for regression in regressions:
+            print("Régression: %s" %regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Banc d'essai de la FileDePriorite en tas binaire et de la construction
+de l'arbre de Huffman, comparés à l'ancienne file en liste triée.
+
+Usage: python -m benchmarks.file_de_priorite [taille_alphabet ...]
+"""
+
+import argparse
+import random
+import time
+from huffman.arbre_huffman import ArbreHuffman
+from huffman.compteur import Compteur
+from huffman.file_de_priorite import FileDePriorite
+from huffman import huffman
+
+class FileDePrioriteListe(object):
+    """Ancienne FileDePriorite en liste triée, en O(n) par opération, gardée comme référence"""
+
+    def __init__(self):
+        self._file = []
+
+    def enfiler(self, element, i=0):
+        element < element
+        for iterable in self._file:
+            element < iterable
+        while i < len(self._file) and element > self._file[i]:
+            i = i+1
+        self._file.insert(i, element)
+
+    def defiler(self):
+        element = min(self._file)
+        self._file.remove(element)
+        return element
+
+    def __len__(self):
+        return len(self._file)
+
+def compteur_aleatoire(taille_alphabet: int, graine: int = 0) -> Compteur:
+    """
+    Fonction qui crée un compteur de taille_alphabet symboles de deux octets,
+    aux nombres d'occurrences suivant une loi de Zipf
+    """
+    generateur = random.Random(graine)
+    compteur = Compteur()
+    for rang in range(taille_alphabet):
+        occurrences = max(1, int(1000000 / (rang+1)) + generateur.randrange(3))
+        compteur.fixer(rang.to_bytes(2, "big"), occurrences)
+    return compteur
+
+def construction(classe_file, stat: Compteur) -> ArbreHuffman:
+    """
+    Fonction qui construit l'arbre de Huffman avec la classe de file donnée
+    """
+    file = classe_file()
+    for element in sorted(stat.elements):
+        file.enfiler(ArbreHuffman(element=element, nb_occurrences=stat.nb_occurences(element)))
+    while len(file) > 1:
+        file.enfiler(ArbreHuffman(fils_droit=file.defiler(), fils_gauche=file.defiler()))
+    return file.defiler()
+
+def chronometre(fonction, *args, **kwargs) -> float:
+    """
+    Fonction qui retourne la durée d'exécution de fonction en secondes
+    """
+    debut = time.perf_counter()
+    fonction(*args, **kwargs)
+    return time.perf_counter() - debut
+
+def main():
+    """
+    Lance le banc d'essai pour chaque taille d'alphabet demandée
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("tailles", nargs="*", type=int, default=[256, 65536],
+                        help="tailles d'alphabet à mesurer")
+    parser.add_argument("--reference-max", type=int, default=4096,
+                        help="taille d'alphabet au-delà de laquelle la liste triée n'est pas mesurée"
+                        " (quadratique: compter près d'une heure pour 65536)")
+    args = parser.parse_args()
+
+    print("%10s %14s %14s %14s" %("alphabet", "liste (s)", "tas (s)", "deux files (s)"))
+    for taille in args.tailles:
+        stat = compteur_aleatoire(taille)
+        if taille <= args.reference_max:
+            reference = "%14.4f" %chronometre(construction, FileDePrioriteListe, stat)
+        else:
+            reference = "%14s" %"-"
+        tas = chronometre(construction, FileDePriorite, stat)
+        deux_files = chronometre(huffman.arbre_de_huffman, stat, deux_files=True)
+        print("%10d %s %14.4f %14.4f" %(taille, reference, tas, deux_files))
+
+if __name__ == "__main__":
+    main()
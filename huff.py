@@ -2,43 +2,188 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import contextlib
+import cProfile
 import os
+import sys
 from huffman import huffman
+from huffman.blocs import TAILLE_BLOC_MAX
+from huffman.dictionnaire import TableEntrainee, LONGUEUR_MAX_TABLE
+from huffman.evenements import Statistiques, ajouter_ecouteur
 """
 Main du projet de compresseur de Huffman.
 """
 
-parser = argparse.ArgumentParser(description='Huffman compressor')
-
-parser.add_argument("-v","--verbose", help="affiche des informations lors des phases de compression et de décompression", action="store_true")
-parser.add_argument("commande", choices=['c','d'], help="commande: c pour compression, d pour décompression")
-parser.add_argument("nom_fichier_source", help="nom du fichier à compresser ou décompresser")
-parser.add_argument("nom_fichier_destination", help="nom du fichier à créer")
-
-args = parser.parse_args()
-
-if args.verbose:
-    def verboseprint(*args):
-        """
-        Print when verbose is True.
-        """
-        for arg in args:
-            print(arg)
-    #Could also be: verboseprint = print if verbose else lambda *a, **k: None
-else:
-    verboseprint = lambda *args: None #It's a do-nothing function
-
-if os.path.isfile(args.nom_fichier_source):
-    if not os.path.isfile(args.nom_fichier_destination):
-        with open(args.nom_fichier_source, 'rb') as source:
-            with open(args.nom_fichier_destination, 'wb') as destination:
-                if args.commande == 'c':
-                    for i in huffman.compresser(destination, source):
-                        verboseprint(i)
-                else:
-                    for i in huffman.decompresser(destination, source):
-                        verboseprint(i)
+def taille(texte):
+    """
+    Convertit une taille en octets, avec un suffixe K, M ou G facultatif.
+    """
+    multiplicateurs = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    texte = texte.strip().upper().rstrip('IB')
+    if texte and texte[-1] in multiplicateurs:
+        return int(texte[:-1])*multiplicateurs[texte[-1]]
+    return int(texte)
+
+def ouvrir(nom_fichier, mode):
+    """
+    Ouvre un fichier, ou l'entrée ou la sortie standard si son nom est '-'.
+    """
+    if nom_fichier == '-':
+        return contextlib.nullcontext(sys.stdin.buffer if 'r' in mode else sys.stdout.buffer)
+    return open(nom_fichier, mode)
+
+def echantillons(nom):
+    """
+    Echantillons d'entraînement: chaque fichier d'un dossier, ou chaque ligne d'un fichier.
+    """
+    if os.path.isdir(nom):
+        for entree in sorted(os.listdir(nom)):
+            chemin = os.path.join(nom, entree)
+            if os.path.isfile(chemin):
+                with open(chemin, 'rb') as fichier:
+                    yield fichier.read()
+    else:
+        with ouvrir(nom, 'rb') as fichier:
+            yield from fichier.read().splitlines(keepends=True)
+
+def analyseur():
+    """
+    Retourne l'analyseur des arguments de la ligne de commande.
+    """
+    parser = argparse.ArgumentParser(description='Huffman compressor')
+    parser.add_argument("-v","--verbose", help="affiche des informations lors des phases de compression et de décompression", action="store_true")
+    parser.add_argument("-j","--jobs", type=int, default=1, help="nombre de processus pour le format par blocs (0: tous les processeurs)")
+    parser.add_argument("--block-size", type=taille, default=None, help="taille des blocs indépendants, par exemple 1M ou 4M")
+    parser.add_argument("--max-code-length", type=int, default=None, help="longueur maximale des codes en bits, par exemple 11, 12 ou 15")
+    parser.add_argument("--context", action="store_true", help="code chaque octet selon l'octet précédent (contexte d'ordre 1)")
+    parser.add_argument("--symbols", choices=['16bits','mots'], default=None, help="code des mots de 16 bits ou des mots du texte au lieu des octets")
+    parser.add_argument("--streams", type=int, default=None, help="répartit chaque bloc entre ce nombre de flux entrelacés, décodables en parallèle (par exemple 4)")
+    parser.add_argument("--large-header", action="store_true", help="en-tête portable sur 8 octets little-endian, même pour les fichiers de moins de 4 Gio (automatique au-delà)")
+    parser.add_argument("--store-threshold", type=float, default=1.0, help="stocke les données sans codage si le codage dépasse cette fraction de leur taille (1.0 par défaut, 0 pour toujours stocker)")
+    parser.add_argument("--never-store", action="store_true", help="code toujours, même les données incompressibles")
+    parser.add_argument("--sample", type=float, default=None, metavar="FRACTION", help="estime les statistiques sur cette fraction du fichier, par exemple 0.01 pour les très gros fichiers (taux un peu moins bon)")
+    parser.add_argument("--dictionary", action="append", default=[], help="table entraînée à utiliser (compression), ou parmi lesquelles choisir (décompression)")
+    parser.add_argument("--stats", action="store_true", help="affiche à la fin la durée, les octets et le débit de chaque phase, et le taux de compression")
+    parser.add_argument("--profile", metavar="FICHIER", help="enregistre le profil cProfile de l'exécution dans FICHIER (lisible avec python -m pstats)")
+    parser.add_argument("commande", choices=['c','d','t'], help="commande: c pour compression, d pour décompression, t pour entraîner une table")
+    parser.add_argument("nom_fichier_source", help="nom du fichier à compresser ou décompresser, - pour l'entrée standard; pour t, un dossier d'échantillons ou un fichier d'un échantillon par ligne")
+    parser.add_argument("nom_fichier_destination", help="nom du fichier à créer, - pour la sortie standard")
+    return parser
+
+def charger_tables(noms):
+    """
+    Charge les tables entraînées données par --dictionary.
+    """
+    tables = []
+    for nom in noms:
+        with open(nom, 'rb') as fichier:
+            tables.append(TableEntrainee.charger(fichier))
+    return tables
+
+def blocs(args):
+    """
+    Indique si la compression utilisera le format par blocs.
+    """
+    return (args.jobs != 1 or args.block_size is not None or args.context
+            or args.symbols is not None or args.streams is not None
+            or (args.nom_fichier_source == '-' and not sys.stdin.buffer.seekable()))
+
+def traiter(args, source, destination, tables, verboseprint):
+    """
+    Compresse ou décompresse source dans destination.
+    """
+    if args.commande == 'c':
+        for i in huffman.compresser(destination, source, taille_bloc=args.block_size,
+                                    nb_processus=args.jobs,
+                                    longueur_max=args.max_code_length,
+                                    contexte=args.context,
+                                    decoupage=args.symbols,
+                                    nb_flux=args.streams,
+                                    en_tete_large=args.large_header or None,
+                                    table=tables[0] if tables else None,
+                                    seuil_stockage=None if args.never_store else args.store_threshold,
+                                    echantillonnage=args.sample):
+            verboseprint(i)
     else:
+        for i in huffman.decompresser(destination, source, nb_processus=args.jobs,
+                                      tables=tables):
+            verboseprint(i)
+
+def rapport(args, statistiques, sortie_verbose):
+    """
+    Affiche les statistiques des phases et le taux de compression des fichiers ordinaires.
+    """
+    for ligne in statistiques.rapport():
+        print(ligne, file=sortie_verbose)
+    if args.nom_fichier_source != '-' and args.nom_fichier_destination != '-':
+        taille_source = os.path.getsize(args.nom_fichier_source)
+        taille_destination = os.path.getsize(args.nom_fichier_destination)
+        compresse = taille_destination if args.commande == 'c' else taille_source
+        origine = taille_source if args.commande == 'c' else taille_destination
+        if origine > 0:
+            print("Taux de compression: %.4f (%d -> %d octets)"
+                  %(compresse/origine, taille_source, taille_destination), file=sortie_verbose)
+
+def main():
+    """
+    Point d'entrée de la ligne de commande. Les processus de -j réimportent ce module
+    (méthodes de démarrage spawn et forkserver): rien ne doit s'exécuter à l'import.
+    """
+    parser = analyseur()
+    args = parser.parse_args()
+
+    #Les informations ne doivent pas se mêler aux données écrites sur la sortie standard
+    sortie_verbose = sys.stderr if args.nom_fichier_destination == '-' else sys.stdout
+    if args.verbose:
+        def verboseprint(*args):
+            """
+            Print when verbose is True.
+            """
+            for arg in args:
+                print(arg, file=sortie_verbose)
+        #Could also be: verboseprint = print if verbose else lambda *a, **k: None
+    else:
+        verboseprint = lambda *args: None #It's a do-nothing function
+
+    if args.commande == 't' and os.path.isdir(args.nom_fichier_source):
+        existe = True
+    else:
+        existe = args.nom_fichier_source == '-' or os.path.isfile(args.nom_fichier_source)
+
+    if not existe:
+        raise FileNotFoundError("%s n'existe pas. Il ne peut pas être traité."%args.nom_fichier_source)
+    if args.nom_fichier_destination != '-' and os.path.isfile(args.nom_fichier_destination):
         raise FileExistsError("%s existe déjà. Impossible de l'écraser."%args.nom_fichier_destination)
-else:
-    raise FileNotFoundError("%s n'existe pas. Il ne peut pas être traité."%args.nom_fichier_source)
+    if args.commande == 't':
+        table = TableEntrainee.entrainer(echantillons(args.nom_fichier_source),
+                                         args.max_code_length or LONGUEUR_MAX_TABLE)
+        verboseprint(table)
+        with ouvrir(args.nom_fichier_destination, 'wb') as destination:
+            table.enregistrer(destination)
+        return
+    tables = charger_tables(args.dictionary)
+    if args.commande == 'c' and len(tables) > 1:
+        parser.error("une seule table peut servir à la compression")
+    if args.commande == 'c' and args.sample is not None and blocs(args):
+        parser.error("--sample ne s'applique pas au format par blocs (-j, --block-size, --streams, --context, --symbols ou entrée non positionnable)")
+    if args.commande == 'c' and args.large_header and blocs(args):
+        parser.error("--large-header ne s'applique pas au format par blocs (-j, --block-size, --streams, --context, --symbols ou entrée non positionnable)")
+    if args.block_size is not None and not 0 < args.block_size <= TAILLE_BLOC_MAX:
+        parser.error("la taille des blocs doit être entre 1 et %d octets" %TAILLE_BLOC_MAX)
+    if args.stats:
+        statistiques = Statistiques()
+        ajouter_ecouteur(statistiques)
+    with ouvrir(args.nom_fichier_source, 'rb') as source:
+        #En lecture-écriture pour que la décompression puisse projeter le fichier en mémoire
+        with ouvrir(args.nom_fichier_destination, 'w+b') as destination:
+            if args.profile:
+                profil = cProfile.Profile()
+                profil.runcall(traiter, args, source, destination, tables, verboseprint)
+                profil.dump_stats(args.profile)
+            else:
+                traiter(args, source, destination, tables, verboseprint)
+    if args.stats:
+        rapport(args, statistiques, sortie_verbose)
+
+if __name__ == "__main__":
+    main()
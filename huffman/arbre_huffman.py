@@ -2,9 +2,12 @@
 # -*- coding: utf-8 -*-
 
 """
-Module contenant la classe ArbreHuffman et les exceptions associées
+Module contenant la classe ArbreHuffman, sa version compacte en tableaux (ArbreCompact,
+parcouru à travers des vues NoeudHuffman) et les exceptions associées
 """
 
+from array import array
+
 class ArbreHuffmanError(Exception):
     """
     Exception mère des erreurs du module arbre_huffman
@@ -33,6 +36,7 @@ class ArbreHuffman(object):
     Classe ArbreHuffman permettant d'instancier un Arbre de Huffman, un arbre binaire,
     sous la forme d'une feuille ou d'un noeud.
     """
+    __slots__ = ("_element", "_nb_occurrences", "_fils_gauche", "_fils_droit")
 
     def __init__(self, element=None, nb_occurrences=None, fils_gauche=None, fils_droit=None):
         """
@@ -155,29 +159,186 @@ class ArbreHuffman(object):
 
     def __eq__(self, autre):
         """
-        Redéfinition de la méthode __eq__
+        Redéfinition de la méthode __eq__, par un parcours itératif des deux arbres
         """
-        if self.est_une_feuille and autre.est_une_feuille:
-            return ((self.element == autre.element)
-                    and (self.nb_occurrences == autre.nb_occurrences))
-        elif not (self.est_une_feuille or autre.est_une_feuille):
-            return ((self.nb_occurrences == autre.nb_occurrences)
-                    and (self.fils_gauche == autre.fils_gauche)
-                    and (self.fils_droit == autre.fils_droit))
-        else:
-            return False
+        if not isinstance(autre, ArbreHuffman):
+            return NotImplemented
+        pile = [(self, autre)]
+        while pile:
+            (gauche, droit) = pile.pop()
+            if (gauche.est_une_feuille != droit.est_une_feuille
+                    or gauche.nb_occurrences != droit.nb_occurrences):
+                return False
+            if gauche.est_une_feuille:
+                if gauche.element != droit.element:
+                    return False
+            else:
+                pile.append((gauche.fils_droit, droit.fils_droit))
+                pile.append((gauche.fils_gauche, droit.fils_gauche))
+        return True
 
     def __hash__(self):
         """
-        Redéfinition de la méthode __hash__
+        Redéfinition de la méthode __hash__, en temps constant: seuls le nombre
+        d'occurrences et l'élément d'une feuille interviennent
         """
-        if self.est_une_feuille:
-            return 3*hash(self.nb_occurrences)+5*hash(self.element)
-        else:
-            return 3*hash(self.nb_occurrences)+3*hash(self.fils_gauche)+5*hash(self.fils_droit)
+        return hash((self.nb_occurrences, self.element if self.est_une_feuille else None))
 
     def __ne__(self, autre):
         """
         Redéfinition de la méthode __ne__
         """
         return not self == autre
+
+class NoeudHuffman(ArbreHuffman):
+    """
+    Vue sur un noeud d'un ArbreCompact, qui offre l'interface d'ArbreHuffman
+    sans copier l'arbre
+    """
+    __slots__ = ("compact", "indice")
+
+    def __init__(self, compact, indice: int):
+        """Méthode d'initialisation de la classe NoeudHuffman"""
+        self.compact = compact
+        self.indice = indice
+
+    @property
+    def est_une_feuille(self):
+        """Property qui retourne si le noeud est une feuille ou non"""
+        return self.compact.gauche[self.indice] < 0
+
+    @property
+    def nb_occurrences(self):
+        """Property qui retourne le poids du noeud"""
+        return self.compact.poids[self.indice]
+
+    @property
+    def element(self):
+        """
+        Property qui retourne l'élément d'une feuille.
+        Sinon l'exception DoitEtreUneFeuilleError est levée
+        """
+        if not self.est_une_feuille:
+            raise DoitEtreUneFeuilleError(
+                "%s doit être une feuille pour posséder un élément" %self)
+        return self.compact.elements[self.compact.symbole[self.indice]]
+
+    @property
+    def fils_gauche(self):
+        """
+        Property qui retourne la vue du fils gauche.
+        Exception NeDoitPasEtreUneFeuilleError levée si le noeud est une feuille
+        """
+        if self.est_une_feuille:
+            raise NeDoitPasEtreUneFeuilleError(
+                "%s est une feuille. Elle ne possède pas de fils gauche"%self)
+        return NoeudHuffman(self.compact, self.compact.gauche[self.indice])
+
+    @property
+    def fils_droit(self):
+        """
+        Property qui retourne la vue du fils droit.
+        Exception NeDoitPasEtreUneFeuilleError levée si le noeud est une feuille
+        """
+        if self.est_une_feuille:
+            raise NeDoitPasEtreUneFeuilleError(
+                "%s est une feuille. Elle ne possède pas de fils droit"%self)
+        return NoeudHuffman(self.compact, self.compact.droit[self.indice])
+
+    def __eq__(self, autre):
+        """
+        Redéfinition de la méthode __eq__: deux vues du même noeud sont égales sans parcours
+        """
+        if (isinstance(autre, NoeudHuffman) and autre.compact is self.compact
+                and autre.indice == self.indice):
+            return True
+        return ArbreHuffman.__eq__(self, autre)
+
+    __hash__ = ArbreHuffman.__hash__
+
+class ArbreCompact(object):
+    """
+    Arbre de Huffman stocké dans des tableaux d'entiers parallèles: pour le noeud i,
+    gauche[i] et droit[i] sont les indices de ses fils (-1 pour une feuille), symbole[i]
+    l'indice de son élément dans elements (-1 pour un noeud interne) et poids[i] son
+    nombre d'occurrences. Les fils précèdent toujours leur père; la racine est le dernier noeud.
+    """
+    __slots__ = ("gauche", "droit", "symbole", "poids", "elements")
+
+    def __init__(self):
+        """Méthode d'initialisation d'un arbre vide"""
+        self.gauche = array("i")
+        self.droit = array("i")
+        self.symbole = array("i")
+        self.poids = array("Q")
+        self.elements = []
+
+    def ajouter_feuille(self, element, nb_occurrences: int) -> int:
+        """
+        Méthode qui ajoute une feuille et retourne son indice
+        """
+        if not (element and nb_occurrences):
+            raise ArbreHuffmanIncoherentError(
+                "Une feuille doit avoir un élément et un nombre d'occurrences")
+        self.gauche.append(-1)
+        self.droit.append(-1)
+        self.symbole.append(len(self.elements))
+        self.poids.append(nb_occurrences)
+        self.elements.append(element)
+        return len(self.poids) - 1
+
+    def ajouter_noeud(self, fils_gauche: int, fils_droit: int) -> int:
+        """
+        Méthode qui ajoute un noeud de fils d'indices donnés et retourne son indice
+        """
+        if fils_gauche == fils_droit or not 0 <= min(fils_gauche, fils_droit) < len(self.poids):
+            raise ArbreHuffmanIncoherentError(
+                "Il est impossible d'initialiser un Arbre de Huffman de cette façon")
+        self.gauche.append(fils_gauche)
+        self.droit.append(fils_droit)
+        self.symbole.append(-1)
+        self.poids.append(self.poids[fils_gauche] + self.poids[fils_droit])
+        return len(self.poids) - 1
+
+    @property
+    def racine(self) -> NoeudHuffman:
+        """Property qui retourne la vue de la racine"""
+        if not self.poids:
+            raise ArbreHuffmanIncoherentError("L'arbre est vide")
+        return NoeudHuffman(self, len(self.poids) - 1)
+
+    def codes(self, indice: int = None) -> {object, (int, int)}:
+        """
+        Méthode qui retourne le code (entier, longueur) de chaque élément du sous-arbre
+        d'indice donné (la racine par défaut), 0 à gauche et 1 à droite.
+        Un arbre réduit à une feuille donne le code 0 de longueur 1.
+        """
+        if indice is None:
+            indice = len(self.poids) - 1
+        gauche, droit, symbole, elements = self.gauche, self.droit, self.symbole, self.elements
+        if gauche[indice] < 0:
+            return {elements[symbole[indice]]: (0, 1)}
+        codes = {}
+        pile = [(indice, 0, 0)]
+        while pile:
+            (noeud, code, longueur) = pile.pop()
+            if gauche[noeud] < 0:
+                codes[elements[symbole[noeud]]] = (code, longueur)
+            else:
+                pile.append((droit[noeud], code << 1 | 1, longueur+1))
+                pile.append((gauche[noeud], code << 1, longueur+1))
+        return codes
+
+    def longueurs(self, indice: int = None) -> {object, int}:
+        """
+        Méthode qui retourne la longueur du code de chaque élément du sous-arbre
+        """
+        return {element: longueur for element, (code, longueur) in self.codes(indice).items()}
+
+    def __len__(self):
+        """Redéfinition de __len__: nombre de noeuds"""
+        return len(self.poids)
+
+    def __repr__(self):
+        """Redéfinition de __repr__"""
+        return "ArbreCompact, %d noeuds, %d feuilles" %(len(self), len(self.elements))
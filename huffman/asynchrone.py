@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant la compression et la décompression de flux réseau avec asyncio.
+Les données sont lues sur un asyncio.StreamReader ou un itérateur asynchrone de morceaux
+et écrites sur un asyncio.StreamWriter, dans le format par blocs. Le codage des blocs est
+confié à un exécuteur (fils ou processus) pour ne pas bloquer la boucle, et chaque
+écriture attend drain().
+"""
+
+import asyncio
+from functools import partial
+from .blocs import TAILLE_BLOC, compresser_bloc, decompresser_bloc
+from .huffman import FormatHuffmanError
+from .memoire import Compresseur, Decompresseur
+
+TAILLE_LECTURE = 1 << 16
+
+async def morceaux_async(lecteur, taille_morceau: int = TAILLE_LECTURE):
+    """
+    Générateur asynchrone des morceaux d'un StreamReader (ou de tout objet ayant une
+    coroutine read) ou d'un itérateur asynchrone de morceaux
+    """
+    if hasattr(lecteur, "read"):
+        while True:
+            morceau = await lecteur.read(taille_morceau)
+            if not morceau:
+                return
+            yield morceau
+    else:
+        async for morceau in lecteur:
+            yield morceau
+
+async def compresser_async(lecteur, ecrivain, taille_bloc: int = TAILLE_BLOC,
+                           executeur=None, **options) -> int:
+    """
+    Fonction qui compresse le flux lecteur dans ecrivain et retourne le nombre d'octets lus.
+    executeur est transmis à run_in_executor (None: l'exécuteur par défaut de la boucle);
+    seule la fonction compresser_bloc lui est confiée, le découpage et l'index restant dans
+    la boucle: un ProcessPoolExecutor convient. Les blocs d'un même morceau sont compressés
+    en parallèle. Les options sont transmises à compresser_bloc.
+    """
+    boucle = asyncio.get_running_loop()
+    compresseur = Compresseur(taille_bloc, **options)
+    taille = 0
+
+    async def ecrire(blocs):
+        """
+        Fonction qui compresse des blocs dans l'exécuteur et écrit leurs enregistrements
+        dans l'ordre
+        """
+        enregistrements = await asyncio.gather(*(
+            boucle.run_in_executor(executeur, partial(compresser_bloc, bloc, **options))
+            for bloc in blocs))
+        for bloc, enregistrement in zip(blocs, enregistrements):
+            ecrivain.write(compresseur.ajouter(enregistrement, len(bloc)))
+        await ecrivain.drain()
+
+    async for morceau in morceaux_async(lecteur):
+        taille += len(morceau)
+        blocs = compresseur.decouper(morceau)
+        if blocs:
+            await ecrire(blocs)
+    reste = compresseur.vider()
+    if reste:
+        await ecrire([reste])
+    ecrivain.write(compresseur.terminer())
+    await ecrivain.drain()
+    return taille
+
+async def decompresser_async(lecteur, ecrivain, executeur=None,
+                             taille_sortie: int = TAILLE_BLOC) -> int:
+    """
+    Fonction qui décompresse le flux par blocs lecteur dans ecrivain et retourne le nombre
+    d'octets écrits. Seule la fonction decompresser_bloc est confiée à executeur; les blocs
+    d'un même morceau sont décodés en parallèle. Au plus taille_sortie octets décodés sont
+    écrits à la fois.
+    """
+    boucle = asyncio.get_running_loop()
+    decompresseur = Decompresseur()
+    taille = 0
+    async for morceau in morceaux_async(lecteur):
+        decodes = await asyncio.gather(*(
+            boucle.run_in_executor(executeur, decompresser_bloc, *enregistrement)
+            for enregistrement in decompresseur.enregistrements(morceau)))
+        for octets in decodes:
+            for debut in range(0, len(octets), taille_sortie):
+                ecrivain.write(octets[debut:debut+taille_sortie])
+                await ecrivain.drain()
+            taille += len(octets)
+    if not decompresseur.fin:
+        raise FormatHuffmanError("Flux par blocs tronqué")
+    return taille
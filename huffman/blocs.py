@@ -0,0 +1,414 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant le format par blocs: l'entrée est découpée en blocs indépendants,
+chacun avec sa propre table de codes, compressés et décompressés en parallèle sur
+plusieurs processus, et suivis d'un index permettant l'accès direct à une plage d'octets.
+
+Format: "HUFB", puis pour chaque bloc un type (1 octet), la taille originale et la taille
+des données (4 octets chacune), les données; un type BLOC_FIN; enfin l'index: pour chaque
+bloc sa position dans le fichier compressé et dans le fichier d'origine (8 octets chacune),
+la taille de son enregistrement et sa taille originale (4 octets chacune), puis le nombre
+de blocs (4 octets) et "HUFI". Les positions compressées partent du début de "HUFB".
+Un bloc de type BLOC_STOCKE contient ses octets d'origine, sans codage.
+Un bloc de type BLOC_ENTRELACE répartit ses octets à tour de rôle entre N flux de bits
+indépendants (l'octet i dans le flux i mod N), codés avec la même table: les longueurs
+de code, N (1 octet), la taille des N-1 premiers flux (4 octets chacune), puis les flux.
+Les flux peuvent ainsi être décodés en parallèle, même dans un seul bloc.
+"""
+
+import bisect
+import io
+import os
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from .canonique import ecrire_longueurs, lire_longueurs
+from .codage import Encodeur
+from .contexte import compresser_contexte, decompresser_contexte
+from .symboles import compresser_symboles, decompresser_symboles
+from .evenements import phase
+from .huffman import (FormatHuffmanError, ORDRE_OCTETS, SEUIL_STOCKAGE, longueurs_en_cache,
+                      codes_en_cache, table_en_cache, histogramme_octets, compteur_octets,
+                      stockage_preferable, cout_limitation)
+
+IDENTIFIANT_BLOCS = "HUFB"
+IDENTIFIANT_INDEX = b"HUFI"
+TAILLE_BLOC = 1 << 20
+#Les tailles d'un enregistrement de bloc sont sur 4 octets
+TAILLE_BLOC_MAX = (1 << 32)-1
+BLOC_FIN = 0
+BLOC_HUFFMAN = 1
+BLOC_CONTEXTE = 2
+BLOC_SYMBOLES = 3
+BLOC_STOCKE = 4
+BLOC_ENTRELACE = 5
+NB_FLUX_MAX = 255
+TAILLE_EN_TETE_BLOC = 9
+TAILLE_ENTREE_INDEX = 24
+
+EntreeIndex = namedtuple("EntreeIndex", ["position_compressee", "position_originale",
+                                         "taille_compressee", "taille_originale"])
+
+def coder(donnees, codes: {bytes, (int, int)}) -> bytes:
+    """
+    Fonction qui retourne le flux de bits des données codées avec codes
+    """
+    morceaux = []
+    encodeur = Encodeur(codes, morceaux.append)
+    encodeur.encoder(donnees)
+    encodeur.terminer()
+    return b"".join(morceaux)
+
+def compresser_bloc(donnees: bytes, longueur_max: int = None, contexte: bool = False,
+                    decoupage: str = None, seuil_stockage: float = SEUIL_STOCKAGE,
+                    nb_flux: int = None, cout: [int] = None) -> bytes:
+    """
+    Fonction qui compresse un bloc en mémoire et retourne son enregistrement complet.
+    Avec contexte, le bloc est codé en contexte d'ordre 1 (module contexte); avec
+    decoupage, il est codé sur un alphabet de symboles "16bits" ou "mots" (module symboles).
+    Avec nb_flux supérieur à 1, les octets sont répartis entre nb_flux flux entrelacés.
+    Un bloc dont le codage dépasserait seuil_stockage fois sa taille, ou TAILLE_BLOC_MAX
+    octets, est stocké tel quel;
+    pour le codage d'ordre 0, l'entropie et la taille codée exacte sont évaluées avant de coder.
+    Avec longueur_max, les bits d'un bloc codé avec et sans limite sont ajoutés à cout
+    (voir cout_limitation).
+    """
+    if len(donnees) > TAILLE_BLOC_MAX:
+        raise ValueError("Bloc trop grand: %d octets (au plus %d)" %(len(donnees), TAILLE_BLOC_MAX))
+    if contexte and decoupage is not None:
+        raise ValueError("Le contexte d'ordre 1 ne s'applique qu'aux octets")
+    if nb_flux is not None and not 1 <= nb_flux <= NB_FLUX_MAX:
+        raise ValueError("Le nombre de flux doit être entre 1 et %d: %d" %(NB_FLUX_MAX, nb_flux))
+    if nb_flux not in (None, 1) and (contexte or decoupage is not None):
+        raise ValueError("L'entrelacement ne s'applique qu'au codage d'ordre 0")
+    occurrences = None
+    cout_bloc = [0, 0]
+    if decoupage is not None:
+        type_bloc = BLOC_SYMBOLES
+        charge = compresser_symboles(donnees, decoupage, longueur_max, cout_bloc)
+    elif contexte:
+        type_bloc = BLOC_CONTEXTE
+        charge = compresser_contexte(donnees, longueur_max, cout_bloc)
+    else:
+        if not donnees:
+            #Sans octet, il n'y a pas d'arbre: l'enregistrement vide est stocké
+            return enregistrement_bloc(BLOC_STOCKE, 0, b"")
+        occurrences = histogramme_octets(donnees)
+        if stockage_preferable(occurrences, seuil_stockage):
+            return enregistrement_bloc(BLOC_STOCKE, len(donnees), donnees)
+        longueurs = longueurs_en_cache(compteur_octets(occurrences), longueur_max)
+        if stockage_preferable(occurrences, seuil_stockage, longueurs):
+            return enregistrement_bloc(BLOC_STOCKE, len(donnees), donnees)
+        if longueur_max is not None:
+            cout_limitation(compteur_octets(occurrences), longueurs, cout_bloc)
+        en_tete = ecrire_longueurs([longueurs.get(i.to_bytes(1, sys.byteorder), 0)
+                                    for i in range(256)])
+        codes = codes_en_cache(longueurs)
+        if nb_flux is None or nb_flux == 1:
+            type_bloc = BLOC_HUFFMAN
+            charge = en_tete + coder(donnees, codes)
+        else:
+            type_bloc = BLOC_ENTRELACE
+            flux = [coder(donnees[numero::nb_flux], codes) for numero in range(nb_flux)]
+            charge = b"".join([en_tete, bytes([nb_flux])]
+                              + [len(f).to_bytes(4, ORDRE_OCTETS) for f in flux[:-1]] + flux)
+    if (len(charge) > TAILLE_BLOC_MAX
+            or seuil_stockage is not None and len(charge) > seuil_stockage*len(donnees)):
+        return enregistrement_bloc(BLOC_STOCKE, len(donnees), donnees)
+    if cout is not None:
+        cout[0] += cout_bloc[0]
+        cout[1] += cout_bloc[1]
+    return enregistrement_bloc(type_bloc, len(donnees), charge)
+
+def compresser_bloc_cout(donnees: bytes, **options) -> (bytes, [int]):
+    """
+    Fonction compresser_bloc qui retourne aussi le coût de la limitation des codes du
+    bloc, pour les processus de compresser_blocs
+    """
+    cout = [0, 0]
+    return (compresser_bloc(donnees, cout=cout, **options), cout)
+
+def enregistrement_bloc(type_bloc: int, taille_originale: int, charge) -> bytes:
+    """
+    Fonction qui retourne l'enregistrement d'un bloc: type, taille d'origine, taille
+    et octets de la charge
+    """
+    return (bytes([type_bloc]) + taille_originale.to_bytes(4, ORDRE_OCTETS)
+            + len(charge).to_bytes(4, ORDRE_OCTETS) + charge)
+
+def decompresser_bloc(type_bloc: int, taille_originale: int, charge: bytes,
+                      limite: int = None, executeur=None) -> bytes:
+    """
+    Fonction qui décompresse les données d'un bloc et retourne ses octets d'origine,
+    ou seulement les limite premiers. executeur décode en parallèle les flux d'un bloc
+    entrelacé (voir decompresser_entrelace).
+    """
+    if limite is not None:
+        taille_originale = min(taille_originale, limite)
+    if type_bloc == BLOC_STOCKE:
+        return bytes(charge[:taille_originale])
+    if type_bloc == BLOC_CONTEXTE:
+        return decompresser_contexte(charge, taille_originale)
+    if type_bloc == BLOC_SYMBOLES:
+        return decompresser_symboles(charge, taille_originale)
+    if type_bloc == BLOC_ENTRELACE:
+        return decompresser_entrelace(charge, taille_originale, executeur)
+    if type_bloc != BLOC_HUFFMAN:
+        raise FormatHuffmanError("Type de bloc inconnu: %d" %type_bloc)
+    flux = io.BytesIO(charge)
+    longueurs = {i.to_bytes(1, sys.byteorder): l
+                 for i, l in enumerate(lire_longueurs(flux)) if l > 0}
+    if taille_originale == 0:
+        return b""
+    return table_en_cache(longueurs).decoder_octets(charge[flux.tell():], taille_originale)
+
+def flux_entrelaces(charge: bytes, taille_originale: int) -> ({bytes, int}, [(bytes, int)]):
+    """
+    Fonction qui lit la charge d'un bloc entrelacé et retourne ses longueurs de code
+    et, pour chaque flux, ses octets et le nombre d'octets d'origine qu'il code
+    """
+    flux = io.BytesIO(charge)
+    longueurs = {i.to_bytes(1, sys.byteorder): l
+                 for i, l in enumerate(lire_longueurs(flux)) if l > 0}
+    position = flux.tell()
+    if position >= len(charge) or charge[position] < 1:
+        raise FormatHuffmanError("Bloc entrelacé sans flux")
+    nb_flux = charge[position]
+    position += 1
+    tailles = [int.from_bytes(charge[position+4*i:position+4*i+4], ORDRE_OCTETS)
+               for i in range(nb_flux-1)]
+    position += 4*(nb_flux-1)
+    tailles.append(len(charge) - position - sum(tailles))
+    if tailles[-1] < 0:
+        raise FormatHuffmanError("Table des flux entrelacés incohérente")
+    resultat = []
+    for numero, taille in enumerate(tailles):
+        resultat.append((charge[position:position+taille],
+                         len(range(numero, taille_originale, nb_flux))))
+        position += taille
+    return (longueurs, resultat)
+
+def decoder_flux(longueurs: {bytes, int}, flux: bytes, nombre: int) -> bytes:
+    """
+    Fonction qui décode les nombre premiers octets d'un flux d'un bloc entrelacé
+    """
+    if nombre == 0:
+        return b""
+    return table_en_cache(longueurs).decoder_octets(flux, nombre)
+
+def decompresser_entrelace(charge: bytes, taille_originale: int, executeur=None) -> bytes:
+    """
+    Fonction qui décode les flux d'un bloc entrelacé et rassemble leurs octets. Avec un
+    executeur (concurrent.futures), les flux sont décodés en parallèle. Seul le début de
+    chaque flux est décodé si taille_originale est inférieure à la taille du bloc.
+    """
+    (longueurs, flux) = flux_entrelaces(charge, taille_originale)
+    appliquer = map if executeur is None else executeur.map
+    return entrelacer(list(appliquer(decoder_flux, repeat(longueurs), *zip(*flux))),
+                      taille_originale)
+
+def entrelacer(decodes: [bytes], taille_originale: int) -> bytes:
+    """
+    Fonction qui rassemble les octets décodés des flux d'un bloc entrelacé
+    """
+    resultat = bytearray(taille_originale)
+    for numero, octets in enumerate(decodes):
+        resultat[numero::len(decodes)] = octets
+    return bytes(resultat)
+
+def lire_bloc(source: io.RawIOBase) -> (int, int, bytes):
+    """
+    Fonction qui lit l'enregistrement d'un bloc. Retourne None sur le marqueur de fin.
+    """
+    en_tete = source.read(TAILLE_EN_TETE_BLOC)
+    if not en_tete or en_tete[0] == BLOC_FIN:
+        return None
+    if len(en_tete) < TAILLE_EN_TETE_BLOC:
+        raise FormatHuffmanError("En-tête de bloc tronqué")
+    taille_originale = int.from_bytes(en_tete[1:5], ORDRE_OCTETS)
+    taille_donnees = int.from_bytes(en_tete[5:9], ORDRE_OCTETS)
+    charge = source.read(taille_donnees)
+    if len(charge) < taille_donnees:
+        raise FormatHuffmanError("Bloc tronqué")
+    return (en_tete[0], taille_originale, charge)
+
+def compresser_blocs(destination: io.RawIOBase, source: io.RawIOBase,
+                     taille_bloc: int = TAILLE_BLOC, nb_processus: int = 1, **options):
+    """
+    Fonction de compression par blocs. Avec plus d'un processus, les blocs sont compressés
+    par un ProcessPoolExecutor; au plus deux blocs par processus sont en attente à la fois.
+    nb_processus à None ou 0 utilise tous les processeurs.
+    Les options sont transmises à compresser_bloc. Avec longueur_max, le surcoût des codes
+    limités, totalisé sur les blocs codés, est annoncé à la fin.
+    """
+    def blocs_compresses():
+        """
+        Fonction qui lit les blocs du flux source et retourne leurs enregistrements dans l'ordre
+        """
+        blocs = iter(lambda: source.read(taille_bloc), b"")
+        if nb_processus == 1:
+            for bloc in blocs:
+                yield (compresser_bloc_cout(bloc, **options), len(bloc))
+            return
+        with ProcessPoolExecutor(nb_processus) as executeur:
+            en_cours = deque()
+            for bloc in blocs:
+                en_cours.append((executeur.submit(compresser_bloc_cout, bloc, **options),
+                                 len(bloc)))
+                if len(en_cours) >= 2*nb_processus:
+                    (resultat, taille) = en_cours.popleft()
+                    yield (resultat.result(), taille)
+            while en_cours:
+                (resultat, taille) = en_cours.popleft()
+                yield (resultat.result(), taille)
+
+    if not 0 < taille_bloc <= TAILLE_BLOC_MAX:
+        raise ValueError("La taille de bloc doit être entre 1 et %d: %d" %(TAILLE_BLOC_MAX, taille_bloc))
+    nb_processus = nb_processus or os.cpu_count() or 1
+    yield "Compression par blocs de %d octets sur %d processus" %(taille_bloc, nb_processus)
+    destination.write(IDENTIFIANT_BLOCS.encode("ascii"))
+    index = []
+    position_compressee = len(IDENTIFIANT_BLOCS)
+    position_originale = 0
+    (taille_limitee, taille_libre) = (0, 0)
+    with phase("compression des blocs") as suivi:
+        for ((enregistrement, cout), taille) in blocs_compresses():
+            taille_limitee += cout[0]
+            taille_libre += cout[1]
+            yield "Ecriture du bloc %d" %len(index)
+            destination.write(enregistrement)
+            index.append(EntreeIndex(position_compressee, position_originale,
+                                     len(enregistrement), taille))
+            position_compressee += len(enregistrement)
+            position_originale += taille
+            suivi.progression(position_originale, position_compressee)
+    destination.write(bytes([BLOC_FIN]))
+    if options.get("longueur_max") is not None and taille_libre > 0:
+        yield ("Codes limités à %d bits: %d bits au lieu de %d (+%.3f%%)"
+               %(options["longueur_max"], taille_limitee, taille_libre,
+                 100*(taille_limitee-taille_libre)/taille_libre))
+    yield "Ecriture de l'index"
+    destination.write(ecrire_index(index))
+    yield "Création du fichier compressé"
+
+def ecrire_index(index: [EntreeIndex]) -> bytes:
+    """
+    Fonction qui encode l'index des blocs, terminé par le nombre de blocs et IDENTIFIANT_INDEX
+    """
+    morceaux = []
+    for entree in index:
+        morceaux.append(entree.position_compressee.to_bytes(8, ORDRE_OCTETS)
+                        + entree.position_originale.to_bytes(8, ORDRE_OCTETS)
+                        + entree.taille_compressee.to_bytes(4, ORDRE_OCTETS)
+                        + entree.taille_originale.to_bytes(4, ORDRE_OCTETS))
+    morceaux.append(len(index).to_bytes(4, ORDRE_OCTETS) + IDENTIFIANT_INDEX)
+    return b"".join(morceaux)
+
+def lire_index(source: io.RawIOBase) -> [EntreeIndex]:
+    """
+    Fonction qui lit l'index à la fin d'un fichier par blocs, qui doit permettre seek
+    """
+    source.seek(-8, io.SEEK_END)
+    fin = source.read(8)
+    if fin[4:] != IDENTIFIANT_INDEX:
+        raise FormatHuffmanError("Index de blocs introuvable")
+    nb_blocs = int.from_bytes(fin[:4], ORDRE_OCTETS)
+    source.seek(-8-nb_blocs*TAILLE_ENTREE_INDEX, io.SEEK_END)
+    donnees = source.read(nb_blocs*TAILLE_ENTREE_INDEX)
+    index = []
+    for debut in range(0, len(donnees), TAILLE_ENTREE_INDEX):
+        entree = donnees[debut:debut+TAILLE_ENTREE_INDEX]
+        index.append(EntreeIndex(int.from_bytes(entree[0:8], ORDRE_OCTETS),
+                                 int.from_bytes(entree[8:16], ORDRE_OCTETS),
+                                 int.from_bytes(entree[16:20], ORDRE_OCTETS),
+                                 int.from_bytes(entree[20:24], ORDRE_OCTETS)))
+    return index
+
+def lire_plage(source: io.RawIOBase, debut: int, taille: int,
+               index: [EntreeIndex] = None, executeur=None) -> bytes:
+    """
+    Fonction qui retourne les taille octets d'origine à partir de la position debut,
+    en ne décompressant que les blocs qui les contiennent. L'index peut être passé
+    pour éviter de le relire à chaque appel. executeur décode en parallèle les flux
+    des blocs entrelacés.
+    """
+    if index is None:
+        index = lire_index(source)
+    if debut < 0 or taille < 0:
+        raise ValueError("Plage invalide: %d octets à partir de %d" %(taille, debut))
+    fin = debut + taille
+    morceaux = []
+    numero = max(0, bisect.bisect_right([e.position_originale for e in index], debut)-1)
+    while numero < len(index) and index[numero].position_originale < fin:
+        entree = index[numero]
+        source.seek(entree.position_compressee)
+        bloc = lire_bloc(source)
+        donnees = decompresser_bloc(*bloc, limite=fin-entree.position_originale,
+                                    executeur=executeur)
+        morceaux.append(donnees[max(0, debut-entree.position_originale):])
+        numero += 1
+    return b"".join(morceaux)
+
+def decompresser_blocs(destination: io.RawIOBase, source: io.RawIOBase, nb_processus: int = 1):
+    """
+    Fonction de décompression par blocs, le flux source étant placé après l'identifiant.
+    Avec plus d'un processus, les blocs sont décompressés par un ProcessPoolExecutor
+    et écrits dans l'ordre; chaque flux d'un bloc entrelacé y est une tâche distincte,
+    pour qu'un bloc seul soit aussi décodé en parallèle.
+    """
+    def blocs():
+        """
+        Fonction qui lit les enregistrements des blocs jusqu'au marqueur de fin
+        """
+        nonlocal lus
+        bloc = lire_bloc(source)
+        while bloc is not None:
+            lus += TAILLE_EN_TETE_BLOC + len(bloc[2])
+            yield bloc
+            bloc = lire_bloc(source)
+
+    def ecrire(octets: bytes):
+        """
+        Fonction qui écrit les octets d'un bloc et annonce la progression
+        """
+        destination.write(octets)
+        suivi.progression(lus, suivi.octets_ecrits + len(octets))
+
+    nb_processus = nb_processus or os.cpu_count() or 1
+    numero = 0
+    lus = 0
+    with phase("décompression des blocs") as suivi:
+        if nb_processus == 1:
+            for bloc in blocs():
+                yield "Décompression du bloc %d" %numero
+                ecrire(decompresser_bloc(*bloc))
+                numero += 1
+            return
+        with ProcessPoolExecutor(nb_processus) as executeur:
+            def soumettre(bloc):
+                """
+                Fonction qui confie un bloc, ou chacun de ses flux entrelacés, à l'exécuteur
+                et retourne la fonction qui attend ses octets
+                """
+                (type_bloc, taille_originale, charge) = bloc
+                if type_bloc != BLOC_ENTRELACE:
+                    return executeur.submit(decompresser_bloc, *bloc).result
+                (longueurs, flux) = flux_entrelaces(charge, taille_originale)
+                futurs = [executeur.submit(decoder_flux, longueurs, octets, nombre)
+                          for octets, nombre in flux]
+                return lambda: entrelacer([futur.result() for futur in futurs], taille_originale)
+
+            en_cours = deque()
+            for bloc in blocs():
+                en_cours.append(soumettre(bloc))
+                if len(en_cours) >= 2*nb_processus:
+                    yield "Décompression du bloc %d" %numero
+                    ecrire(en_cours.popleft()())
+                    numero += 1
+            while en_cours:
+                yield "Décompression du bloc %d" %numero
+                ecrire(en_cours.popleft()())
+                numero += 1
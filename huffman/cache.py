@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module contenant le cache des tables construites: arbres, longueurs de code, tables de
+codage et de décodage, indexés par l'empreinte de l'histogramme ou des longueurs de code.
+Un même histogramme, ou des histogrammes voisins qui donnent les mêmes longueurs,
+réutilisent ainsi les tables déjà construites dans le processus.
+"""
+
+import threading
+from collections import OrderedDict
+
+TAILLE_CACHE = 64
+
+class CacheTables(object):
+    """
+    Cache LRU de taille bornée, partagé par les fils d'exécution. Compte les succès,
+    les échecs et les évictions. Les valeurs ne doivent pas être modifiées par l'appelant.
+    """
+
+    def __init__(self, taille_max: int = TAILLE_CACHE):
+        """Méthode d'initialisation, taille_max nulle désactive le cache"""
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle, construire):
+        """
+        Méthode qui retourne la valeur associée à cle, construite par construire()
+        et mémorisée si elle est absente
+        """
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return self._entrees[cle]
+            self.echecs += 1
+        valeur = construire()
+        with self._verrou:
+            if self.taille_max > 0:
+                self._entrees[cle] = valeur
+                self._entrees.move_to_end(cle)
+                while len(self._entrees) > self.taille_max:
+                    self._entrees.popitem(last=False)
+                    self.evictions += 1
+        return valeur
+
+    def vider(self):
+        """Méthode qui vide le cache et remet les compteurs à zéro"""
+        with self._verrou:
+            self._entrees.clear()
+            self.succes = self.echecs = self.evictions = 0
+
+    def __len__(self):
+        """Redéfinition de __len__"""
+        return len(self._entrees)
+
+    def __repr__(self):
+        """Redéfinition de __repr__"""
+        return ("CacheTables, taille: %d/%d, succès: %d, échecs: %d, évictions: %d"
+                %(len(self), self.taille_max, self.succes, self.echecs, self.evictions))
+
+CACHE = CacheTables()
+
+def empreinte(valeurs) -> tuple:
+    """
+    Fonction qui retourne l'empreinte d'un histogramme ou d'une liste de longueurs
+    """
+    if isinstance(valeurs, dict):
+        return tuple(sorted(valeurs.items()))
+    return tuple(valeurs)
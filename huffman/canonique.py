@@ -0,0 +1,151 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant les codes de Huffman canoniques: calcul des longueurs de code,
+reconstruction des codes à partir des seules longueurs et écriture compacte
+de la table des longueurs dans l'en-tête.
+"""
+
+import math
+from .arbre_huffman import ArbreHuffman, NoeudHuffman
+
+class CodeCanoniqueError(Exception):
+    """
+    Exception levée lorsqu'une table de longueurs de code est incohérente
+    """
+
+MODE_OCTETS = 0
+MODE_QUARTETS = 1
+MODE_RLE = 2
+
+def longueurs_de_code(arbre: ArbreHuffman) -> {object, int}:
+    """
+    Fonction qui retourne la longueur du code de chaque élément de l'arbre.
+    Un arbre réduit à une feuille donne un code de longueur 1.
+    """
+    if isinstance(arbre, NoeudHuffman):
+        return arbre.compact.longueurs(arbre.indice)
+    if arbre.est_une_feuille:
+        return {arbre.element: 1}
+    longueurs = {}
+    pile = [(arbre, 0)]
+    while pile:
+        (noeud, profondeur) = pile.pop()
+        if noeud.est_une_feuille:
+            longueurs[noeud.element] = profondeur
+        else:
+            pile.append((noeud.fils_droit, profondeur+1))
+            pile.append((noeud.fils_gauche, profondeur+1))
+    return longueurs
+
+def longueurs_limitees(occurrences: {object, int}, longueur_max: int) -> {object, int}:
+    """
+    Fonction qui calcule des longueurs de code optimales parmi celles qui ne dépassent pas
+    longueur_max, par l'algorithme package-merge. Les paquets gardent une référence
+    vers leurs deux composants au lieu de la liste de leurs symboles.
+    """
+    elements = sorted(occurrences, key=lambda e: (occurrences[e], e))
+    nb_elements = len(elements)
+    if nb_elements == 1:
+        return {elements[0]: 1}
+    if nb_elements > 1 << longueur_max:
+        raise CodeCanoniqueError("%d symboles ne peuvent pas être codés sur %d bits au plus"
+                                 %(nb_elements, longueur_max))
+    feuilles = [(occurrences[e], i) for i, e in enumerate(elements)]
+    niveau = feuilles
+    for _ in range(longueur_max-1):
+        paquets = [(niveau[i][0]+niveau[i+1][0], (niveau[i][1], niveau[i+1][1]))
+                   for i in range(0, len(niveau)-1, 2)]
+        niveau = sorted(feuilles + paquets, key=lambda paquet: paquet[0])
+    comptes = [0]*nb_elements
+    pile = [noeud for (poids, noeud) in niveau[:2*nb_elements-2]]
+    while pile:
+        noeud = pile.pop()
+        if isinstance(noeud, int):
+            comptes[noeud] += 1
+        else:
+            pile.extend(noeud)
+    return {e: comptes[i] for i, e in enumerate(elements)}
+
+def taille_codee(occurrences: {object, int}, longueurs: {object, int}) -> int:
+    """
+    Fonction qui retourne le nombre de bits des données codées avec ces longueurs
+    """
+    return sum(occurrence*longueurs[e] for e, occurrence in occurrences.items())
+
+def entropie(occurrences: [int]) -> float:
+    """
+    Fonction qui retourne l'entropie de Shannon totale, en bits, de données ayant
+    ces nombres d'occurrences: aucun code préfixe ne les code en moins de bits
+    """
+    total = sum(occurrences)
+    return sum(occurrence*math.log2(total/occurrence) for occurrence in occurrences if occurrence)
+
+def codes_canoniques(longueurs: {object, int}) -> {object, (int, int)}:
+    """
+    Fonction qui retourne le code canonique de chaque élément sous la forme
+    (code, longueur). Les éléments sont numérotés par longueur puis par ordre croissant.
+    """
+    codes = {}
+    code = 0
+    longueur_precedente = 0
+    for (longueur, element) in sorted((l, e) for e, l in longueurs.items() if l > 0):
+        code <<= longueur - longueur_precedente
+        if code >> longueur:
+            raise CodeCanoniqueError("Les longueurs de code ne respectent pas l'inégalité de Kraft")
+        codes[element] = (code, longueur)
+        code += 1
+        longueur_precedente = longueur
+    return codes
+
+def ecrire_longueurs(longueurs: [int], rle: bool = True) -> bytes:
+    """
+    Fonction qui encode la liste des longueurs de code des symboles 0 à n-1.
+    La forme la plus courte est retenue parmi un octet par longueur, deux longueurs
+    par octet (si toutes tiennent sur 4 bits) et, si rle, des couples (longueur, répétitions).
+    """
+    if max(longueurs, default=0) > 255:
+        raise CodeCanoniqueError("Une longueur de code ne tient pas sur un octet")
+    candidats = [bytes([MODE_OCTETS]) + bytes(longueurs)]
+    if max(longueurs, default=0) < 16:
+        quartets = bytearray([MODE_QUARTETS])
+        for i in range(0, len(longueurs), 2):
+            quartets.append(longueurs[i] << 4 | (longueurs[i+1] if i+1 < len(longueurs) else 0))
+        candidats.append(bytes(quartets))
+    if rle:
+        plages = bytearray([MODE_RLE])
+        i = 0
+        while i < len(longueurs):
+            j = i+1
+            while j < len(longueurs) and j-i < 256 and longueurs[j] == longueurs[i]:
+                j += 1
+            plages += bytes([longueurs[i], j-i-1])
+            i = j
+        candidats.append(bytes(plages))
+    return min(candidats, key=len)
+
+def lire_longueurs(source, nb_symboles: int = 256) -> [int]:
+    """
+    Fonction qui lit dans le flux source une liste de longueurs écrite par ecrire_longueurs
+    """
+    mode = source.read(1)
+    if mode == bytes([MODE_OCTETS]):
+        longueurs = list(source.read(nb_symboles))
+    elif mode == bytes([MODE_QUARTETS]):
+        longueurs = []
+        for octet in source.read((nb_symboles+1)//2):
+            longueurs += [octet >> 4, octet & 0x0F]
+        longueurs = longueurs[:nb_symboles]
+    elif mode == bytes([MODE_RLE]):
+        longueurs = []
+        while len(longueurs) < nb_symboles:
+            plage = source.read(2)
+            if len(plage) < 2:
+                break
+            longueurs += [plage[0]]*(plage[1]+1)
+    else:
+        raise CodeCanoniqueError("Mode de table des longueurs inconnu: %s" %mode)
+    if len(longueurs) != nb_symboles:
+        raise CodeCanoniqueError("Table des longueurs tronquée")
+    return longueurs
@@ -0,0 +1,244 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module contenant la classe Encodeur: écriture d'un flux de Huffman à partir
+d'une table de codes (code entier, longueur) et d'un accumulateur de bits entier.
+Si NumPy est installé, les grands morceaux sont encodés d'un bloc (voir
+Encodeur._encoder_vectorise), avec un résultat identique bit à bit.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class EncodageError(Exception):
+    """
+    Exception levée lorsqu'un octet à encoder n'a pas de code dans la table
+    """
+
+TAILLE_SORTIE = 1 << 20
+OCTETS_PAR_VIDAGE = 64
+SEUIL_VECTORISE = 1 << 12
+SYMBOLES_PAR_LOT = 1 << 15
+LONGUEUR_MAX_VECTORISE = 57
+
+class Encodeur(object):
+    """
+    Encodeur d'octets. Les codes sont décalés dans un accumulateur entier, vidé par
+    paquets de OCTETS_PAR_VIDAGE octets dans un tampon préalloué, lui-même écrit
+    par blocs de TAILLE_SORTIE octets. Les bits d'un octet incomplet sont
+    conservés d'un appel à encoder au suivant.
+    """
+
+    def __init__(self, codes: {bytes, (int, int)}, ecrire, taille_sortie: int = TAILLE_SORTIE,
+                 vectorise: bool = None):
+        """
+        codes associe à chaque octet (sous forme de bytes de longueur 1) son code
+        et sa longueur, ecrire reçoit les octets compressés. Le tampon de sortie
+        peut être réduit pour les petits messages. vectorise à None utilise NumPy
+        s'il est installé, False ne l'utilise jamais, True l'impose.
+        """
+        self._table = [None]*256
+        for element, code in codes.items():
+            self._table[element[0]] = code
+        self._ecrire = ecrire
+        self._accumulateur = 0
+        self._nb_bits = 0
+        self._taille_sortie = taille_sortie
+        self._sortie = bytearray(taille_sortie + OCTETS_PAR_VIDAGE)
+        self._position = 0
+        if vectorise and numpy is None:
+            raise ImportError("L'encodage vectorisé nécessite NumPy")
+        self._codes_vectorises = None
+        self._longueurs_vectorisees = None
+        if vectorise is not False and numpy is not None and all(
+                code is None or code[1] <= LONGUEUR_MAX_VECTORISE for code in self._table):
+            self._codes_vectorises = numpy.array(
+                [code[0] if code else 0 for code in self._table], numpy.uint64)
+            self._longueurs_vectorisees = numpy.array(
+                [code[1] if code else 0 for code in self._table], numpy.int64)
+            #Nombre d'octets couverts au plus par un code, décalé de 0 à 7 bits
+            self._fenetre_vectorisee = (int(self._longueurs_vectorisees.max()) + 14)//8
+        elif vectorise:
+            raise ValueError("L'encodage vectorisé est limité aux codes de %d bits"
+                             %LONGUEUR_MAX_VECTORISE)
+        self._seuil_vectorise = 0 if vectorise else SEUIL_VECTORISE
+
+    def encoder(self, donnees):
+        """
+        Méthode qui encode un objet de type bytes (bytes, bytearray, memoryview...)
+        """
+        if self._codes_vectorises is not None and len(donnees) >= self._seuil_vectorise:
+            self._encoder_vectorise(donnees)
+            return
+        table = self._table
+        sortie = self._sortie
+        position = self._position
+        accumulateur = self._accumulateur
+        nb_bits = self._nb_bits
+        bits_vidage = 8*OCTETS_PAR_VIDAGE
+        octet = None
+        try:
+            for octet in donnees:
+                (code, longueur) = table[octet]
+                accumulateur = accumulateur << longueur | code
+                nb_bits += longueur
+                if nb_bits >= bits_vidage:
+                    nb_bits -= bits_vidage
+                    sortie[position:position+OCTETS_PAR_VIDAGE] = (
+                        accumulateur >> nb_bits).to_bytes(OCTETS_PAR_VIDAGE, "big")
+                    accumulateur &= (1 << nb_bits)-1
+                    position += OCTETS_PAR_VIDAGE
+                    if position >= self._taille_sortie:
+                        self._ecrire(bytes(sortie[:position]))
+                        position = 0
+        except (TypeError, KeyError):
+            raise EncodageError("Le symbole %r n'a pas de code dans la table"
+                                %(bytes([octet]) if isinstance(octet, int) else octet))
+        finally:
+            self._position = position
+            self._accumulateur = accumulateur
+            self._nb_bits = nb_bits
+
+    def _encoder_vectorise(self, donnees):
+        """
+        Méthode privée qui encode les données par lots de SYMBOLES_PAR_LOT octets avec NumPy:
+        les codes et longueurs sont lus dans des tableaux, la somme cumulée des longueurs
+        donne la position de chaque code, et chaque code, aligné dans une fenêtre de
+        quelques octets, est réparti sur les octets de sortie qu'il couvre. Les codes ne
+        se chevauchant pas, ces morceaux sont additionnés par numpy.bincount. Les bits qui
+        ne forment pas un octet entier restent dans l'accumulateur pour le lot suivant.
+        """
+        #Les octets entiers de l'accumulateur et le tampon sont d'abord écrits
+        nb_bits = self._nb_bits % 8
+        nb_octets = self._nb_bits // 8
+        self._sortie[self._position:self._position+nb_octets] = (
+            self._accumulateur >> nb_bits).to_bytes(nb_octets, "big")
+        self._position += nb_octets
+        accumulateur = self._accumulateur & ((1 << nb_bits)-1)
+        self._accumulateur = accumulateur
+        self._nb_bits = nb_bits
+        if self._position:
+            self._ecrire(bytes(self._sortie[:self._position]))
+            self._position = 0
+        octets = numpy.frombuffer(donnees, numpy.uint8)
+        fenetre = self._fenetre_vectorisee
+        sorties = []
+        taille_sorties = 0
+        for debut in range(0, len(octets), SYMBOLES_PAR_LOT):
+            lot = octets[debut:debut+SYMBOLES_PAR_LOT]
+            longueurs = self._longueurs_vectorisees[lot]
+            if not longueurs.all():
+                octet = int(lot[numpy.argmin(longueurs)])
+                raise EncodageError("Le symbole %r n'a pas de code dans la table" %bytes([octet]))
+            debuts = numpy.cumsum(longueurs)
+            total = int(debuts[-1]) + nb_bits
+            debuts += nb_bits - longueurs
+            positions = debuts >> 3
+            alignes = self._codes_vectorises[lot] << (8*fenetre - (debuts & 7)
+                                                      - longueurs).astype(numpy.uint64)
+            nb_sortie = (total+7)//8
+            somme = numpy.zeros(nb_sortie + fenetre)
+            for i in range(fenetre):
+                somme += numpy.bincount(positions + i, (alignes >> numpy.uint64(8*(fenetre-1-i)))
+                                        & numpy.uint64(0xff), nb_sortie + fenetre)
+            somme[0] += accumulateur << (8-nb_bits)
+            sortie = somme[:nb_sortie].astype(numpy.uint8).tobytes()
+            nb_bits = total % 8
+            if nb_bits:
+                accumulateur = sortie[-1] >> (8-nb_bits)
+                sortie = sortie[:-1]
+            else:
+                accumulateur = 0
+            sorties.append(sortie)
+            taille_sorties += len(sortie)
+            if taille_sorties >= self._taille_sortie:
+                self._ecrire(b"".join(sorties))
+                sorties = []
+                taille_sorties = 0
+            self._accumulateur = accumulateur
+            self._nb_bits = nb_bits
+        if sorties:
+            self._ecrire(b"".join(sorties))
+
+    def terminer(self):
+        """
+        Méthode qui écrit les derniers bits, complétés par des 0 jusqu'à l'octet entier
+        """
+        nb_octets = (self._nb_bits+7)//8
+        self._sortie[self._position:self._position+nb_octets] = (
+            self._accumulateur << (8*nb_octets-self._nb_bits)).to_bytes(nb_octets, "big")
+        self._position += nb_octets
+        if self._position:
+            self._ecrire(bytes(self._sortie[:self._position]))
+        self._position = 0
+        self._accumulateur = 0
+        self._nb_bits = 0
+
+class EncodeurContexte(Encodeur):
+    """
+    Encodeur d'ordre 1: le code de chaque octet est pris dans la table de l'octet
+    qui le précède (0 pour le premier octet).
+    """
+
+    def __init__(self, codes_par_contexte: [{bytes, (int, int)}], ecrire):
+        """
+        codes_par_contexte donne, pour chacun des 256 octets précédents possibles,
+        la table de codes à utiliser.
+        """
+        Encodeur.__init__(self, {}, ecrire, vectorise=False)
+        self._table = [None]*65536
+        for contexte, codes in enumerate(codes_par_contexte):
+            for element, code in codes.items():
+                self._table[contexte << 8 | element[0]] = code
+        self._precedent = 0
+
+    def encoder(self, donnees):
+        """
+        Méthode qui encode un objet de type bytes (bytes, bytearray, memoryview...)
+        """
+        table = self._table
+        sortie = self._sortie
+        position = self._position
+        accumulateur = self._accumulateur
+        nb_bits = self._nb_bits
+        precedent = self._precedent
+        bits_vidage = 8*OCTETS_PAR_VIDAGE
+        octet = None
+        try:
+            for octet in donnees:
+                (code, longueur) = table[precedent | octet]
+                precedent = octet << 8
+                accumulateur = accumulateur << longueur | code
+                nb_bits += longueur
+                if nb_bits >= bits_vidage:
+                    nb_bits -= bits_vidage
+                    sortie[position:position+OCTETS_PAR_VIDAGE] = (
+                        accumulateur >> nb_bits).to_bytes(OCTETS_PAR_VIDAGE, "big")
+                    accumulateur &= (1 << nb_bits)-1
+                    position += OCTETS_PAR_VIDAGE
+                    if position >= self._taille_sortie:
+                        self._ecrire(bytes(sortie[:position]))
+                        position = 0
+        except TypeError:
+            raise EncodageError("L'octet %r n'a pas de code dans son contexte" %bytes([octet]))
+        finally:
+            self._position = position
+            self._accumulateur = accumulateur
+            self._nb_bits = nb_bits
+            self._precedent = precedent
+
+class EncodeurSymboles(Encodeur):
+    """
+    Encodeur sur un alphabet quelconque: encoder reçoit une suite de symboles
+    hachables (par exemple des mots de 16 bits ou des lexèmes) au lieu d'octets.
+    """
+
+    def __init__(self, codes: {object, (int, int)}, ecrire):
+        """
+        codes associe à chaque symbole son code et sa longueur
+        """
+        Encodeur.__init__(self, {}, ecrire, vectorise=False)
+        self._table = dict(codes)
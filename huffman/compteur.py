@@ -1,7 +1,28 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-"""Module contenant la classe Compteur"""
+"""
+Module contenant la classe Compteur, creuse, adaptée aux grands alphabets,
+et sa spécialisation dense CompteurOctets pour les 256 valeurs d'octets
+"""
+
+import io
+from array import array
+from collections import Counter
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from .entiers import ecrire_entier, lire_entier
+
+class CompteurError(Exception):
+    """
+    Exception levée lorsqu'un compteur ne peut pas être sérialisé ou relu
+    """
+
+IDENTIFIANT_CREUX = b"CPTS"
+IDENTIFIANT_DENSE = b"CPTO"
+OCTETS = [bytes([octet]) for octet in range(256)]
 
 class Compteur(object):
     """Classe Compteur, créer dictionnaire qui compte le nombre d'occurrences des clés"""
@@ -21,6 +42,11 @@ class Compteur(object):
         """Méthode qui fixe la valeur d'une clé"""
         self._compteur[element] = valeur
 
+    def fusionner(self, autre):
+        """Méthode qui ajoute les occurrences d'un autre Compteur à celles-ci"""
+        for element in autre.elements:
+            self.fixer(element, self.nb_occurences(element) + autre.nb_occurences(element))
+
     def nb_occurences(self, element):
         """Méthode qui retourne le nombre d'occurrences d'une clé"""
         return self._compteur[element] if element in self._compteur else 0
@@ -32,19 +58,64 @@ class Compteur(object):
 
     def _elements_condition(self, valeur):
         """Méthode qui retourne une liste de clé selon une condition sur le nombre d'occurrences"""
-        return [k for k in self.elements if self._compteur[k] == valeur]
+        return [k for k in self.elements if self.nb_occurences(k) == valeur]
 
     def elements_moins_frequents(self):
         """Méthode qui retourne les clés qui apparaissent le moins"""
-        return self._elements_condition(min(self._compteur.values()))
+        return self._elements_condition(min(self.nb_occurences(k) for k in self.elements))
 
     def elements_plus_frequents(self):
         """Méthode qui retourne les clés qui apparaissent le plus"""
-        return self._elements_condition(max(self._compteur.values()))
+        return self._elements_condition(max(self.nb_occurences(k) for k in self.elements))
 
     def elements_par_nb_occurrences(self):
-        """Méthode qui retourne les clés et les occurrences, classés par nombre d'occurrences"""
-        return [(i, self._elements_condition(i)) for i in set(self._compteur.values())]
+        """
+        Méthode qui retourne les clés et les occurrences, classés par nombre d'occurrences,
+        en un seul parcours des clés
+        """
+        groupes = {}
+        for element in self.elements:
+            groupes.setdefault(self.nb_occurences(element), []).append(element)
+        return sorted(groupes.items(), key=lambda groupe: groupe[0])
+
+    def elements_tries(self):
+        """
+        Méthode qui retourne les couples (clé, occurrences), du plus fréquent au moins
+        fréquent, en O(n log n)
+        """
+        return sorted(((k, self.nb_occurences(k)) for k in self.elements),
+                      key=lambda couple: -couple[1])
+
+    def mettre_a_jour(self, symboles):
+        """Méthode qui ajoute une occurrence de chaque symbole d'un itérable"""
+        for element, nombre in Counter(symboles).items():
+            self._compteur[element] = self._compteur.get(element, 0) + nombre
+
+    def copie(self):
+        """Méthode qui retourne une copie du compteur"""
+        copie = self.__class__()
+        copie.fusionner(self)
+        return copie
+
+    def __add__(self, autre):
+        """Redéfinition de __add__: somme des occurrences de deux compteurs"""
+        somme = self.copie()
+        somme.fusionner(autre)
+        return somme
+
+    def serialiser(self) -> bytes:
+        """
+        Méthode qui écrit le compteur sous forme d'octets: IDENTIFIANT_CREUX, le nombre
+        de clés, puis chaque clé (longueur et octets) et son nombre d'occurrences,
+        en entiers à nombre variable d'octets. Les clés doivent être de type bytes.
+        """
+        morceaux = [IDENTIFIANT_CREUX, ecrire_entier(len(self.elements))]
+        for element in self.elements:
+            if not isinstance(element, bytes):
+                raise CompteurError("Seules les clés de type bytes sont sérialisables: %r" %element)
+            morceaux += [ecrire_entier(len(element)), element,
+                         ecrire_entier(self.nb_occurences(element))]
+        return b"".join(morceaux)
 
     def __repr__(self):
         """Redéfinition de __repr__"""
@@ -54,6 +125,115 @@ class Compteur(object):
         """Redéfinition de __str__"""
         return "Compteur contenant: %s"%self.elements
 
+class CompteurOctets(Compteur):
+    """
+    Compteur dense des 256 valeurs d'octets, dont les clés sont des bytes de longueur 1.
+    Les occurrences sont rangées dans un array('Q'), compté en masse avec NumPy s'il est installé.
+    """
+
+    def __init__(self, occurrences: [int] = None):
+        """Méthode d'initialisation, avec les 256 nombres d'occurrences facultatifs"""
+        self._occurrences = array("Q", occurrences if occurrences is not None else [0]*256)
+        if len(self._occurrences) != 256:
+            raise CompteurError("Un compteur d'octets a 256 valeurs, pas %d" %len(self._occurrences))
+
+    @staticmethod
+    def _octet(element) -> int:
+        """
+        Méthode privée qui retourne la valeur d'une clé d'un octet, et lève CompteurError
+        pour toute autre clé
+        """
+        if not isinstance(element, (bytes, bytearray)) or len(element) != 1:
+            raise CompteurError("Un compteur d'octets ne compte que des clés d'un octet: %r"
+                                %(element,))
+        return element[0]
+
+    def incrementer(self, element):
+        """Méthode qui incrémente le nombre d'occurrences d'un octet"""
+        self._occurrences[self._octet(element)] += 1
+
+    def fixer(self, element, valeur):
+        """Méthode qui fixe le nombre d'occurrences d'un octet"""
+        self._occurrences[self._octet(element)] = valeur
+
+    def nb_occurences(self, element):
+        """Méthode qui retourne le nombre d'occurrences d'un octet"""
+        return self._occurrences[element[0]] if len(element) == 1 else 0
+
+    @property
+    def elements(self):
+        """Méthode retournant la liste des octets présents"""
+        return [OCTETS[octet] for octet, nombre in enumerate(self._occurrences) if nombre]
+
+    def occurrences(self) -> [int]:
+        """Méthode qui retourne les 256 nombres d'occurrences"""
+        return self._occurrences.tolist()
+
+    def mettre_a_jour(self, donnees):
+        """Méthode qui compte les octets d'un objet de type bytes (bytes, memoryview...)"""
+        if numpy is not None:
+            total = numpy.frombuffer(self._occurrences, numpy.uint64)
+            total += numpy.bincount(numpy.frombuffer(donnees, numpy.uint8),
+                                    minlength=256).astype(numpy.uint64)
+        else:
+            for octet, nombre in Counter(donnees).items():
+                self._occurrences[octet] += nombre
+
+    def fusionner(self, autre):
+        """Méthode qui ajoute les occurrences d'un autre compteur d'octets"""
+        if isinstance(autre, CompteurOctets):
+            for octet, nombre in enumerate(autre._occurrences):
+                self._occurrences[octet] += nombre
+        else:
+            Compteur.fusionner(self, autre)
+
+    def __add__(self, autre):
+        """
+        Redéfinition de __add__: la somme avec un compteur dont des clés ne sont pas
+        des octets est un Compteur creux
+        """
+        if isinstance(autre, CompteurOctets) or all(
+                isinstance(e, (bytes, bytearray)) and len(e) == 1 for e in autre.elements):
+            return Compteur.__add__(self, autre)
+        somme = Compteur()
+        somme.fusionner(self)
+        somme.fusionner(autre)
+        return somme
+
+    def elements_tries(self):
+        """
+        Méthode qui retourne les couples (octet, occurrences), du plus fréquent au moins fréquent
+        """
+        return [(OCTETS[octet], nombre) for octet, nombre in
+                sorted(enumerate(self._occurrences), key=lambda couple: -couple[1]) if nombre]
+
+    def serialiser(self) -> bytes:
+        """
+        Méthode qui écrit IDENTIFIANT_DENSE puis les 256 nombres d'occurrences
+        en entiers à nombre variable d'octets
+        """
+        return IDENTIFIANT_DENSE + b"".join(ecrire_entier(nombre) for nombre in self._occurrences)
+
+    def __repr__(self):
+        """Redéfinition de __repr__"""
+        return "CompteurOctets, taille: %d"%len(self.elements)
+
+def deserialiser(donnees: bytes) -> Compteur:
+    """
+    Fonction qui relit un Compteur ou un CompteurOctets écrit par serialiser
+    """
+    flux = io.BytesIO(donnees)
+    identifiant = flux.read(4)
+    if identifiant == IDENTIFIANT_DENSE:
+        return CompteurOctets([lire_entier(flux) for _ in range(256)])
+    if identifiant != IDENTIFIANT_CREUX:
+        raise CompteurError("Ce n'est pas un compteur sérialisé")
+    compteur = Compteur()
+    for _ in range(lire_entier(flux)):
+        element = flux.read(lire_entier(flux))
+        compteur.fixer(element, lire_entier(flux))
+    return compteur
+
 if __name__ == "__main__":
     C = Compteur()
     C.incrementer('a')
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant le codage en contexte d'ordre 1: chaque octet est codé avec une table
+choisie selon l'octet qui le précède. Les contextes pour lesquels une table propre ne
+rapporte pas plus qu'elle ne coûte dans l'en-tête partagent une table commune.
+
+Données d'un bloc: les longueurs de la table commune, un masque de 32 octets des
+contextes qui ont leur propre table, les longueurs de ces tables dans l'ordre des
+contextes, puis les données codées.
+"""
+
+import io
+from collections import Counter
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from .canonique import codes_canoniques, ecrire_longueurs, lire_longueurs, taille_codee
+from .codage import EncodeurContexte
+from .decodage import decoder_contexte
+from .huffman import compteur_octets, cout_limitation, longueurs_huffman, table_en_cache
+
+BITS_PAR_LECTURE_CONTEXTE = 8
+
+def occurrences_contexte(donnees) -> [[int]]:
+    """
+    Fonction qui retourne, pour chaque octet précédent possible, les 256 nombres
+    d'occurrences de l'octet suivant. Le premier octet a pour contexte 0.
+    """
+    if numpy is not None:
+        octets = numpy.frombuffer(donnees, numpy.uint8).astype(numpy.intp)
+        precedents = numpy.zeros_like(octets)
+        precedents[1:] = octets[:-1]
+        return numpy.bincount(precedents*256 + octets, minlength=65536).reshape(256, 256).tolist()
+    paires = Counter(zip(b"\0" + bytes(donnees[:-1]), donnees))
+    occurrences = [[0]*256 for _ in range(256)]
+    for (precedent, octet), nombre in paires.items():
+        occurrences[precedent][octet] = nombre
+    return occurrences
+
+def _longueurs(occurrences: [int], longueur_max: int) -> {int, int}:
+    """
+    Fonction privée qui retourne les longueurs de code des octets présents, indexées par octet
+    """
+    longueurs = longueurs_huffman(compteur_octets(occurrences), longueur_max)
+    return {element[0]: longueur for element, longueur in longueurs.items()}
+
+def _liste(longueurs: {int, int}) -> [int]:
+    """
+    Fonction privée qui retourne les 256 longueurs, nulles pour les octets absents
+    """
+    return [longueurs.get(octet, 0) for octet in range(256)]
+
+def compresser_contexte(donnees, longueur_max: int = None, cout: [int] = None) -> bytes:
+    """
+    Fonction qui code des octets en contexte d'ordre 1 et retourne l'en-tête suivi des données.
+    Avec longueur_max, les bits codés avec et sans limite sont ajoutés à cout (voir
+    cout_limitation).
+    """
+    if len(donnees) == 0:
+        return ecrire_longueurs([0]*256) + bytes(32)
+    occurrences = occurrences_contexte(donnees)
+    totaux = [sum(colonne) for colonne in zip(*occurrences)]
+    longueurs_ordre_0 = _longueurs(totaux, longueur_max)
+    propres = {}
+    for contexte, ligne in enumerate(occurrences):
+        if any(ligne):
+            presents = {octet: nombre for octet, nombre in enumerate(ligne) if nombre}
+            longueurs = _longueurs(ligne, longueur_max)
+            cout_propre = (taille_codee(presents, longueurs)
+                           + 8*len(ecrire_longueurs(_liste(longueurs))))
+            if cout_propre < taille_codee(presents, longueurs_ordre_0):
+                propres[contexte] = longueurs
+    communs = [sum(occurrences[c][octet] for c in range(256) if c not in propres)
+               for octet in range(256)]
+    longueurs_communes = _longueurs(communs, longueur_max) if any(communs) else {}
+    if cout is not None and longueur_max is not None:
+        for contexte, longueurs in propres.items():
+            cout_limitation(compteur_octets(occurrences[contexte]),
+                            {bytes([octet]): l for octet, l in longueurs.items()}, cout)
+        if any(communs):
+            cout_limitation(compteur_octets(communs),
+                            {bytes([octet]): l for octet, l in longueurs_communes.items()}, cout)
+
+    en_tete = [ecrire_longueurs(_liste(longueurs_communes))]
+    masque = 0
+    for contexte in propres:
+        masque |= 1 << contexte
+    en_tete.append(masque.to_bytes(32, "little"))
+    for contexte in sorted(propres):
+        en_tete.append(ecrire_longueurs(_liste(propres[contexte])))
+
+    def codes(longueurs):
+        return {bytes([octet]): code for octet, code in codes_canoniques(longueurs).items()}
+    codes_communs = codes(longueurs_communes)
+    codes_propres = {contexte: codes(longueurs) for contexte, longueurs in propres.items()}
+    morceaux = en_tete
+    encodeur = EncodeurContexte([codes_propres.get(contexte, codes_communs)
+                                 for contexte in range(256)], morceaux.append)
+    encodeur.encoder(donnees)
+    encodeur.terminer()
+    return b"".join(morceaux)
+
+def decompresser_contexte(charge: bytes, longueur: int) -> bytes:
+    """
+    Fonction qui décode longueur octets à partir de l'en-tête et des données d'un bloc
+    """
+    flux = io.BytesIO(charge)
+    longueurs_communes = lire_longueurs(flux)
+    masque = int.from_bytes(flux.read(32), "little")
+    propres = {contexte: lire_longueurs(flux) for contexte in range(256) if masque >> contexte & 1}
+    if longueur == 0:
+        return b""
+
+    def table(liste):
+        return table_en_cache({o: l for o, l in enumerate(liste) if l > 0},
+                              BITS_PAR_LECTURE_CONTEXTE, regrouper=False)
+    tables = {contexte: table(liste) for contexte, liste in propres.items()}
+    table_commune = table(longueurs_communes) if any(longueurs_communes) else None
+    defaut = table_commune or next(iter(tables.values()))
+    return decoder_contexte([tables.get(contexte, defaut) for contexte in range(256)],
+                            charge[flux.tell():], longueur)
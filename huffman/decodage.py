@@ -0,0 +1,256 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module contenant la classe TableDecodage: décodage d'un flux de Huffman
+par tables de correspondance précalculées, plusieurs bits et plusieurs symboles à la fois.
+"""
+
+import io
+from .projection import morceaux
+
+class DecodageError(Exception):
+    """
+    Exception levée lorsque les codes fournis ne permettent pas de construire une table de décodage
+    """
+
+TAILLE_BLOC_LECTURE = 1 << 20
+TAILLE_SORTIE = 1 << 20
+OCTETS_PAR_RECHARGE = 32
+
+class TableDecodage(object):
+    """
+    Table de décodage à plusieurs niveaux. Le premier niveau est indexé par les
+    bits_par_lecture prochains bits du flux et donne, en une seule lecture, tous les
+    symboles complets qu'ils contiennent. Les codes plus longs renvoient vers des tables
+    secondaires indexées par les bits suivants.
+    """
+
+    def __init__(self, codes: {bytes, (int, int)}, bits_par_lecture: int = 11,
+                 regrouper: bool = True):
+        """
+        codes associe à chaque symbole (une chaîne d'octets) son code et sa longueur,
+        le premier bit émis étant le poids fort du code. Ce peut aussi être une liste
+        de couples (symbole, (code, longueur)), un symbole pouvant alors avoir plusieurs codes.
+        Sans regrouper, chaque entrée ne donne qu'un symbole, qui peut alors être
+        de n'importe quel type. Un code unique laisse des entrées à None dans la table.
+        """
+        codes = list(codes.items()) if isinstance(codes, dict) else list(codes)
+        if not codes:
+            raise DecodageError("Impossible de décoder sans aucun code")
+        self._codes = codes
+        self.longueur_max = max(longueur for element, (code, longueur) in codes)
+        self.largeur = bits_par_lecture
+        if len(codes) > 1:
+            kraft = sum(1 << (self.longueur_max-longueur) for element, (code, longueur) in codes)
+            if kraft != 1 << self.longueur_max:
+                raise DecodageError("Les codes ne forment pas un code préfixe complet")
+        self.table = self._construire(
+            [(code, longueur, element) for element, (code, longueur) in codes], self.largeur)
+        self._simple = self.table
+        if regrouper and len(codes) > 1:
+            self._regrouper()
+
+    def _construire(self, codes, largeur):
+        """
+        Méthode privée qui construit un niveau de table de largeur bits.
+        Chaque entrée est un triplet (sortie, bits consommés, sous-table ou None).
+        """
+        table = [None]*(1 << largeur)
+        longs = {}
+        for (code, longueur, sortie) in codes:
+            if longueur <= largeur:
+                debut = code << (largeur-longueur)
+                entree = (sortie, longueur, None)
+                for i in range(debut, debut + (1 << (largeur-longueur))):
+                    table[i] = entree
+            else:
+                suffixe = longueur-largeur
+                longs.setdefault(code >> suffixe, []).append(
+                    (code & ((1 << suffixe)-1), suffixe, sortie))
+        for prefixe, suffixes in longs.items():
+            sous_largeur = min(self.largeur, max(longueur for (code, longueur, sortie) in suffixes))
+            table[prefixe] = (b"", largeur, (sous_largeur, self._construire(suffixes, sous_largeur)))
+        return table
+
+    def _regrouper(self):
+        """
+        Méthode privée qui complète chaque entrée du premier niveau avec les symboles
+        suivants tant que leur code tient entièrement dans la fenêtre de lecture.
+        """
+        simple = self.table
+        masque = (1 << self.largeur)-1
+        table = []
+        for index, (sortie, consommes, sous_table) in enumerate(simple):
+            if sous_table is None:
+                morceaux = [sortie]
+                while consommes < self.largeur:
+                    (suivant, longueur, sous_suivant) = simple[(index << consommes) & masque]
+                    if sous_suivant is not None or consommes+longueur > self.largeur:
+                        break
+                    morceaux.append(suivant)
+                    consommes += longueur
+                table.append((b"".join(morceaux), consommes, None))
+            else:
+                table.append((sortie, consommes, sous_table))
+        self.table = table
+
+    def decoder(self, source: io.RawIOBase, destination: io.RawIOBase, longueur: int,
+                taille_bloc: int = TAILLE_BLOC_LECTURE):
+        """
+        Méthode qui décode depuis source les longueur premiers octets et les écrit dans destination
+        """
+        self._decoder(morceaux(source, taille_bloc), longueur, destination.write)
+
+    def decoder_octets(self, donnees: bytes, longueur: int) -> bytes:
+        """
+        Méthode qui décode les longueur premiers octets d'une suite d'octets en mémoire
+        """
+        morceaux = []
+        self._decoder([donnees], longueur, morceaux.append)
+        return b"".join(morceaux)
+
+    def _decoder(self, blocs, longueur: int, ecrire):
+        """
+        Méthode privée de décodage. Les bits sont chargés par paquets de
+        OCTETS_PAR_RECHARGE octets dans un accumulateur entier et la sortie est
+        rassemblée dans un bytearray écrit par gros morceaux.
+        """
+        if longueur <= 0:
+            return
+        if len(self._codes) == 1:
+            #Le dernier symbole peut n'être écrit qu'en partie
+            ((element, code),) = self._codes
+            nb_symboles = -(-longueur // len(element))
+            while nb_symboles > 0:
+                nb_morceau = min(nb_symboles, max(1, TAILLE_SORTIE // len(element)))
+                morceau = element*nb_morceau
+                ecrire(morceau[:longueur])
+                longueur -= len(morceau)
+                nb_symboles -= nb_morceau
+            return
+        table = self.table
+        largeur = self.largeur
+        masque = (1 << largeur)-1
+        seuil = max(largeur, self.longueur_max)
+        recharge = max(OCTETS_PAR_RECHARGE, (seuil+7)//8)
+        bits_recharge = 8*recharge
+        from_bytes = int.from_bytes
+        sortie = bytearray()
+        restant = longueur
+        accumulateur = 0
+        nb_bits = 0
+        reste = b""
+        blocs = iter(blocs)
+        while restant > 0:
+            bloc = next(blocs, None)
+            if bloc is None:
+                break
+            donnees = reste + bloc if reste else bloc
+            position = 0
+            derniere = len(donnees)-recharge
+            while position <= derniere:
+                accumulateur = (((accumulateur & ((1 << nb_bits)-1)) << bits_recharge)
+                                | from_bytes(donnees[position:position+recharge], "big"))
+                nb_bits += bits_recharge
+                position += recharge
+                while nb_bits >= seuil:
+                    (morceau, consommes, sous_table) = table[(accumulateur >> (nb_bits-largeur)) & masque]
+                    nb_bits -= consommes
+                    while sous_table is not None:
+                        (sous_largeur, niveau) = sous_table
+                        (morceau, consommes, sous_table) = niveau[
+                            (accumulateur >> (nb_bits-sous_largeur)) & ((1 << sous_largeur)-1)]
+                        nb_bits -= consommes
+                    sortie += morceau
+                if len(sortie) >= TAILLE_SORTIE or len(sortie) >= restant:
+                    if len(sortie) >= restant:
+                        ecrire(bytes(sortie[:restant]))
+                        restant = 0
+                        break
+                    ecrire(bytes(sortie))
+                    restant -= len(sortie)
+                    sortie.clear()
+            reste = bytes(donnees[position:])
+        if restant > 0:
+            #Fin du flux: les derniers symboles sont décodés un à un pour ne lire aucun bit
+            #au-delà des données
+            accumulateur = (((accumulateur & ((1 << nb_bits)-1)) << 8*len(reste))
+                            | from_bytes(reste, "big"))
+            nb_bits += 8*len(reste)
+            while len(sortie) < restant:
+                (morceau, nb_bits) = _decoder_symbole(self._simple, largeur, accumulateur,
+                                                      nb_bits, restant-len(sortie))
+                sortie += morceau
+            ecrire(bytes(sortie[:restant]))
+
+def _decoder_symbole(table, largeur: int, accumulateur: int, nb_bits: int, manquants: int):
+    """
+    Fonction privée qui décode un symbole avec une table sans regroupement depuis les nb_bits
+    derniers bits de accumulateur, complétés par des zéros. Retourne le symbole et le nombre
+    de bits restants; lève DecodageError si le code dépasse la fin du flux.
+    """
+    sous_table = (largeur, table)
+    while sous_table is not None:
+        (largeur, niveau) = sous_table
+        if nb_bits >= largeur:
+            entree = niveau[(accumulateur >> (nb_bits-largeur)) & ((1 << largeur)-1)]
+        else:
+            entree = niveau[(accumulateur << (largeur-nb_bits)) & ((1 << largeur)-1)]
+        if entree is None:
+            raise DecodageError("Flux compressé invalide: code inconnu")
+        (sortie, consommes, sous_table) = entree
+        nb_bits -= consommes
+        if nb_bits < 0:
+            raise DecodageError("Flux compressé tronqué: %d octets manquants" % manquants)
+    return (sortie, nb_bits)
+
+def decoder_contexte(tables: [TableDecodage], donnees: bytes, longueur: int) -> bytes:
+    """
+    Fonction qui décode longueur octets codés en contexte d'ordre 1: le code de chaque
+    octet est lu dans la table de l'octet précédent (0 pour le premier).
+    Les tables, construites sans regroupement et de même largeur,
+    ont des octets entiers pour symboles.
+    """
+    if longueur <= 0:
+        return b""
+    largeur = tables[0].largeur
+    masque = (1 << largeur)-1
+    seuil = max(largeur, max(table.longueur_max for table in tables))
+    recharge = max(OCTETS_PAR_RECHARGE, (seuil+7)//8)
+    bits_recharge = 8*recharge
+    niveaux = [table.table for table in tables]
+    donnees = bytes(donnees)
+    from_bytes = int.from_bytes
+    sortie = bytearray()
+    precedent = 0
+    accumulateur = 0
+    nb_bits = 0
+    fin = len(donnees)-len(donnees) % recharge
+    for position in range(0, fin, recharge):
+        accumulateur = (((accumulateur & ((1 << nb_bits)-1)) << bits_recharge)
+                        | from_bytes(donnees[position:position+recharge], "big"))
+        nb_bits += bits_recharge
+        while nb_bits >= seuil:
+            (octet, consommes, sous_table) = niveaux[precedent][
+                (accumulateur >> (nb_bits-largeur)) & masque]
+            nb_bits -= consommes
+            while sous_table is not None:
+                (sous_largeur, niveau) = sous_table
+                (octet, consommes, sous_table) = niveau[
+                    (accumulateur >> (nb_bits-sous_largeur)) & ((1 << sous_largeur)-1)]
+                nb_bits -= consommes
+            sortie.append(octet)
+            precedent = octet
+            if len(sortie) == longueur:
+                return bytes(sortie)
+    #Fin du flux: aucun code ne doit dépasser les données
+    accumulateur = (((accumulateur & ((1 << nb_bits)-1)) << 8*(len(donnees)-fin))
+                    | from_bytes(donnees[fin:], "big"))
+    nb_bits += 8*(len(donnees)-fin)
+    while len(sortie) < longueur:
+        (octet, nb_bits) = _decoder_symbole(niveaux[precedent], largeur, accumulateur, nb_bits,
+                                            longueur-len(sortie))
+        sortie.append(octet)
+        precedent = octet
+    return bytes(sortie)
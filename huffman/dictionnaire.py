@@ -0,0 +1,182 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant les tables de codes entraînées: une table est construite une fois
+sur un corpus d'échantillons, enregistrée avec un identifiant, puis partagée par de
+nombreux petits messages qui ne portent plus que cet identifiant.
+
+Un symbole d'échappement est ajouté aux octets du corpus: un octet absent de la table
+est codé par le code d'échappement suivi de ses 8 bits.
+
+Table enregistrée: "HUFT", la version, l'identifiant sur 4 octets, puis les longueurs
+des 256 octets et de l'échappement.
+Message: "HUFD", l'identifiant de la table, la longueur d'origine en entier variable,
+puis les données codées.
+"""
+
+import io
+import zlib
+from .canonique import codes_canoniques, ecrire_longueurs, lire_longueurs, longueurs_limitees
+from .codage import Encodeur
+from .compteur import CompteurOctets
+from .decodage import TableDecodage
+from .entiers import ecrire_entier, lire_entier
+
+class DictionnaireError(Exception):
+    """
+    Exception levée lorsqu'une table entraînée est invalide ou inconnue
+    """
+
+IDENTIFIANT_TABLE = b"HUFT"
+IDENTIFIANT_MESSAGE = b"HUFD"
+VERSION_TABLE = 1
+ECHAPPEMENT = 256
+LONGUEUR_MAX_TABLE = 24
+TAILLE_SORTIE_MESSAGE = 1 << 12
+
+class TableEntrainee(object):
+    """
+    Table de codes partagée. Les tables de codage et de décodage sont construites
+    une seule fois, à la première utilisation.
+    """
+
+    def __init__(self, longueurs: [int]):
+        """
+        longueurs contient les longueurs de code des 256 octets puis de l'échappement
+        """
+        if len(longueurs) != ECHAPPEMENT + 1:
+            raise DictionnaireError("Une table contient %d longueurs, pas %d"
+                                    %(ECHAPPEMENT + 1, len(longueurs)))
+        self.longueurs = list(longueurs)
+        self.identifiant = zlib.crc32(ecrire_longueurs(self.longueurs, rle=False))
+        self._codes = None
+        self._table = None
+
+    @classmethod
+    def entrainer(cls, echantillons, longueur_max: int = LONGUEUR_MAX_TABLE):
+        """
+        Méthode qui construit une table à partir d'une séquence d'échantillons (bytes).
+        L'échappement compte une occurrence par échantillon.
+        """
+        compteur = CompteurOctets()
+        nb_echantillons = 0
+        for echantillon in echantillons:
+            compteur.mettre_a_jour(echantillon)
+            nb_echantillons += 1
+        occurrences = {octet: nombre for octet, nombre in enumerate(compteur.occurrences()) if nombre}
+        if not occurrences:
+            #Sans octet connu, l'échappement a un code vide: chaque octet est stocké tel quel
+            return cls([0]*(ECHAPPEMENT + 1))
+        occurrences[ECHAPPEMENT] = max(nb_echantillons, 1)
+        longueurs = longueurs_limitees(occurrences, longueur_max)
+        return cls([longueurs.get(symbole, 0) for symbole in range(ECHAPPEMENT + 1)])
+
+    def enregistrer(self, destination: io.RawIOBase):
+        """
+        Méthode qui écrit la table dans le flux destination
+        """
+        destination.write(IDENTIFIANT_TABLE + bytes([VERSION_TABLE])
+                          + self.identifiant.to_bytes(4, "little")
+                          + ecrire_longueurs(self.longueurs))
+
+    @classmethod
+    def charger(cls, source: io.RawIOBase):
+        """
+        Méthode qui lit une table écrite par enregistrer
+        """
+        en_tete = source.read(9)
+        if len(en_tete) != 9 or en_tete[:4] != IDENTIFIANT_TABLE:
+            raise DictionnaireError("Ce n'est pas une table entraînée")
+        if en_tete[4] != VERSION_TABLE:
+            raise DictionnaireError("Version de table inconnue: %d" %en_tete[4])
+        table = cls(lire_longueurs(source, ECHAPPEMENT + 1))
+        if table.identifiant != int.from_bytes(en_tete[5:9], "little"):
+            raise DictionnaireError("Identifiant de table incohérent")
+        return table
+
+    def _codes_octets(self) -> {bytes, (int, int)}:
+        """
+        Méthode privée qui retourne le code de chacun des 256 octets, échappement compris
+        """
+        if self._codes is None:
+            presents = {symbole: longueur for symbole, longueur in enumerate(self.longueurs)
+                        if longueur > 0}
+            canoniques = codes_canoniques(presents) if presents else {}
+            (code_echappement, longueur_echappement) = canoniques.get(ECHAPPEMENT, (0, 0))
+            self._codes = {
+                bytes([octet]): canoniques[octet] if octet in canoniques
+                                else (code_echappement << 8 | octet, longueur_echappement + 8)
+                for octet in range(256)}
+        return self._codes
+
+    def _table_decodage(self) -> TableDecodage:
+        """
+        Méthode privée qui retourne la table de décodage. Sous l'échappement, les 256
+        suites de 8 bits sont décodées, pour que le code reste complet.
+        """
+        if self._table is None:
+            presents = {symbole: longueur for symbole, longueur in enumerate(self.longueurs)
+                        if longueur > 0}
+            canoniques = codes_canoniques(presents) if presents else {}
+            (code_echappement, longueur_echappement) = canoniques.get(ECHAPPEMENT, (0, 0))
+            paires = [(bytes([symbole]), code) for symbole, code in canoniques.items()
+                      if symbole != ECHAPPEMENT]
+            paires += [(bytes([octet]), (code_echappement << 8 | octet, longueur_echappement + 8))
+                       for octet in range(256)]
+            self._table = TableDecodage(paires)
+        return self._table
+
+    def compresser(self, donnees) -> bytes:
+        """
+        Méthode qui retourne le message compressé avec cette table
+        """
+        sortie = [IDENTIFIANT_MESSAGE + self.identifiant.to_bytes(4, "little"),
+                  ecrire_entier(len(donnees))]
+        encodeur = Encodeur(self._codes_octets(), sortie.append, TAILLE_SORTIE_MESSAGE)
+        encodeur.encoder(donnees)
+        encodeur.terminer()
+        return b"".join(sortie)
+
+    def decompresser(self, message) -> bytes:
+        """
+        Méthode qui retourne les octets d'origine d'un message compressé avec cette table
+        """
+        source = io.BytesIO(message)
+        if source.read(4) != IDENTIFIANT_MESSAGE:
+            raise DictionnaireError("Ce n'est pas un message compressé avec une table")
+        if int.from_bytes(source.read(4), "little") != self.identifiant:
+            raise DictionnaireError("Le message n'a pas été compressé avec cette table")
+        return self._decompresser(source)
+
+    def _decompresser(self, source: io.BytesIO) -> bytes:
+        """
+        Méthode privée qui décode la suite d'un message, après l'identifiant de table
+        """
+        longueur = lire_entier(source)
+        if longueur == 0:
+            return b""
+        return self._table_decodage().decoder_octets(source.read(), longueur)
+
+    def __repr__(self):
+        """Redéfinition de __repr__"""
+        return "TableEntrainee, identifiant: %08x" %self.identifiant
+
+def table_par_identifiant(tables, identifiant: int) -> TableEntrainee:
+    """
+    Fonction qui retourne la table d'identifiant donné parmi une séquence de tables
+    """
+    for table in tables or ():
+        if table.identifiant == identifiant:
+            return table
+    raise DictionnaireError("Table d'identifiant %08x inconnue" %identifiant)
+
+def decompresser_message(message, tables) -> bytes:
+    """
+    Fonction qui décompresse un message en choisissant la table d'après son identifiant
+    """
+    source = io.BytesIO(message)
+    if source.read(4) != IDENTIFIANT_MESSAGE:
+        raise DictionnaireError("Ce n'est pas un message compressé avec une table")
+    table = table_par_identifiant(tables, int.from_bytes(source.read(4), "little"))
+    return table._decompresser(source)
@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant l'écriture compacte des entiers naturels sur un nombre variable
+d'octets: 7 bits par octet, poids faibles d'abord, le bit de poids fort indiquant
+qu'un octet suit (LEB128).
+"""
+
+class EntierVariableError(Exception):
+    """
+    Exception levée lorsqu'un entier à nombre variable d'octets est négatif ou tronqué
+    """
+
+def ecrire_entier(entier: int) -> bytes:
+    """
+    Fonction qui encode un entier naturel sur un nombre variable d'octets
+    """
+    if entier < 0:
+        raise EntierVariableError("%d est négatif" %entier)
+    octets = bytearray()
+    while entier >= 0x80:
+        octets.append(entier & 0x7F | 0x80)
+        entier >>= 7
+    octets.append(entier)
+    return bytes(octets)
+
+def lire_entier(source) -> int:
+    """
+    Fonction qui lit dans le flux source un entier écrit par ecrire_entier
+    """
+    entier = 0
+    decalage = 0
+    while True:
+        octet = source.read(1)
+        if not octet:
+            raise EntierVariableError("Entier tronqué")
+        entier |= (octet[0] & 0x7F) << decalage
+        if octet[0] < 0x80:
+            return entier
+        decalage += 7
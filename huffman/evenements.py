@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant les événements de progression structurés: début et fin de chaque phase
+de la compression et de la décompression, et progression au fil des données, avec les
+octets lus et écrits, la durée et le débit. Sans écouteur, aucun événement n'est créé.
+"""
+
+import time
+from collections import namedtuple
+
+DEBUT = "debut"
+PROGRESSION = "progression"
+FIN = "fin"
+
+Evenement = namedtuple("Evenement", ["phase", "nature", "octets_lus", "octets_ecrits",
+                                     "duree", "debit"])
+Evenement.__doc__ = """
+Evénement d'une phase: nature vaut DEBUT, PROGRESSION ou FIN, duree est en secondes
+depuis le début de la phase et debit en octets lus par seconde.
+"""
+
+ECOUTEURS = []
+
+def ajouter_ecouteur(ecouteur):
+    """
+    Fonction qui ajoute un écouteur, appelé avec chaque Evenement
+    """
+    ECOUTEURS.append(ecouteur)
+
+def retirer_ecouteur(ecouteur):
+    """
+    Fonction qui retire un écouteur ajouté par ajouter_ecouteur
+    """
+    ECOUTEURS.remove(ecouteur)
+
+class Phase(object):
+    """
+    Gestionnaire de contexte d'une phase écoutée. Les octets lus et écrits sont fixés
+    par l'appelant, et annoncés à la fin de la phase.
+    """
+    __slots__ = ("nom", "octets_lus", "octets_ecrits", "_debut")
+
+    def __init__(self, nom: str, octets_lus: int = 0, octets_ecrits: int = 0):
+        """Méthode d'initialisation de la classe Phase"""
+        self.nom = nom
+        self.octets_lus = octets_lus
+        self.octets_ecrits = octets_ecrits
+        self._debut = None
+
+    def _emettre(self, nature: str):
+        """
+        Méthode privée qui transmet un événement à chaque écouteur
+        """
+        duree = time.perf_counter() - self._debut
+        evenement = Evenement(self.nom, nature, self.octets_lus, self.octets_ecrits, duree,
+                              self.octets_lus/duree if duree > 0 else 0.0)
+        for ecouteur in list(ECOUTEURS):
+            ecouteur(evenement)
+
+    def progression(self, octets_lus: int = None, octets_ecrits: int = None):
+        """
+        Méthode qui met à jour les octets traités et annonce la progression
+        """
+        if octets_lus is not None:
+            self.octets_lus = octets_lus
+        if octets_ecrits is not None:
+            self.octets_ecrits = octets_ecrits
+        self._emettre(PROGRESSION)
+
+    def __enter__(self):
+        """Redéfinition de __enter__: début de la phase"""
+        self._debut = time.perf_counter()
+        self._emettre(DEBUT)
+        return self
+
+    def __exit__(self, type_exception, exception, trace):
+        """Redéfinition de __exit__: fin de la phase, même interrompue par une exception"""
+        self._emettre(FIN)
+        return False
+
+class PhaseMuette(object):
+    """
+    Phase sans écouteur: toutes les opérations sont sans effet
+    """
+    __slots__ = ()
+    nom = None
+    octets_lus = 0
+    octets_ecrits = 0
+
+    def __setattr__(self, nom, valeur):
+        """Redéfinition de __setattr__: les octets fixés sont ignorés"""
+
+    def progression(self, octets_lus: int = None, octets_ecrits: int = None):
+        """Méthode sans effet"""
+
+    def __enter__(self):
+        """Redéfinition de __enter__"""
+        return self
+
+    def __exit__(self, type_exception, exception, trace):
+        """Redéfinition de __exit__"""
+        return False
+
+PHASE_MUETTE = PhaseMuette()
+
+def phase(nom: str, octets_lus: int = 0, octets_ecrits: int = 0):
+    """
+    Fonction qui retourne le gestionnaire de contexte d'une phase, ou PHASE_MUETTE
+    si aucun écouteur n'est attaché
+    """
+    if not ECOUTEURS:
+        return PHASE_MUETTE
+    return Phase(nom, octets_lus, octets_ecrits)
+
+class Statistiques(object):
+    """
+    Ecouteur qui totalise la durée et les octets de chaque phase terminée
+    """
+
+    def __init__(self):
+        """Méthode d'initialisation de la classe Statistiques"""
+        self.phases = {}
+
+    def __call__(self, evenement: Evenement):
+        """Redéfinition de __call__: reçoit un événement"""
+        if evenement.nature != FIN:
+            return
+        (duree, lus, ecrits) = self.phases.get(evenement.phase, (0.0, 0, 0))
+        self.phases[evenement.phase] = (duree + evenement.duree, lus + evenement.octets_lus,
+                                        ecrits + evenement.octets_ecrits)
+
+    def rapport(self) -> [str]:
+        """
+        Méthode qui retourne les lignes d'un tableau des phases
+        """
+        lignes = ["%-24s %10s %12s %12s %10s" %("phase", "durée (s)", "lus", "écrits", "MB/s")]
+        for nom, (duree, lus, ecrits) in self.phases.items():
+            debit = "%10.2f" %(lus/duree/(1 << 20)) if duree > 0 and lus else "%10s" %"-"
+            lignes.append("%-24s %10.4f %12d %12d %s" %(nom, duree, lus, ecrits, debit))
+        return lignes
@@ -3,6 +3,8 @@
 
 """Module contenant la classe FileDePriorite, les exceptions FDPVide et ElementNonComparable"""
 
+import heapq
+
 class FileDePrioriteVideError(Exception):
     """Exception qui se déclenche lorsque qu'on essaie d'accéder à un élément d'une file vide"""
     pass
@@ -11,44 +13,62 @@ class ElementNonComparableError(Exception):
     """Exception concernant les éléments non comparable."""
     pass
 
+class _Entree(object):
+    """
+    Entrée du tas de la FileDePriorite. À priorité égale, l'entrée enfilée
+    en dernier passe devant, comme dans l'ancienne file en liste triée.
+    """
+    __slots__ = ("element", "rang")
+
+    def __init__(self, element, rang):
+        self.element = element
+        self.rang = rang
+
+    def __lt__(self, autre):
+        if self.element < autre.element:
+            return True
+        if autre.element < self.element:
+            return False
+        return self.rang > autre.rang
+
 class FileDePriorite(object):
-    """Classe FileDePriorite. Collection d'éléments"""
+    """Classe FileDePriorite. Collection d'éléments rangés dans un tas binaire"""
 
     def __init__(self, *elements):
         """Méthode d'initialisation de la classe FileDePriorite"""
         self._file = []
+        self._rang = 0
         for element in elements:
             self.enfiler(element)
 
-    def enfiler(self, element, i=0):
-        """Méthode qui enfile un élément dans la file"""
+    def enfiler(self, element):
+        """Méthode qui enfile un élément dans la file, en O(log n)"""
         try:
             element < element
         except Exception:
             raise ElementNonComparableError(
                 "La classe de %s ne possède pas les méthodes de comparaison." %str(element))
-        for iterable in self._file:
+        if not self.est_vide:
             try:
-                element < iterable
+                element < self._file[0].element
             except Exception:
                 raise ElementNonComparableError(
                     "%s n'est pas comparable aux autres éléments de la file" %str(element))
-        if not self.est_vide:
-            while i < len(self._file) and element > self._file[i]:
-                i = i+1
-        self._file.insert(i, element)
+        self._rang += 1
+        heapq.heappush(self._file, _Entree(element, self._rang))
 
     def defiler(self):
-        """Méthode qui défile l'élément le plus prioritaire de la file"""
-        element = self.element
-        self._file.remove(element)
-        return element
+        """Méthode qui défile l'élément le plus prioritaire de la file, en O(log n)"""
+        if self.est_vide:
+            raise FileDePrioriteVideError(
+                "%s est vide. Impossible de défiler." %self.__class__.__name__)
+        return heapq.heappop(self._file).element
 
     @property
     def element(self):
         """Méthode qui retourne l'élément le plus prioritaire d'une file"""
         if not self.est_vide:
-            return min(self._file)
+            return self._file[0].element
         else:
             raise FileDePrioriteVideError(
                 "%s est vide. Impossible d'avoir son élément prioritaire." %self.__class__.__name__)
@@ -60,12 +80,16 @@ class FileDePriorite(object):
     def __len__(self):
         return len(self._file)
 
+    def _elements_tries(self):
+        """Méthode privée qui retourne les éléments dans l'ordre où ils seront défilés"""
+        return [entree.element for entree in sorted(self._file)]
+
     def __repr__(self):
         """Redéfinition de __repr__"""
-        return "FileDePriorité: %s"%self._file
+        return "FileDePriorité: %s"%self._elements_tries()
 
     def __str__(self, cdc=""):
         """Redéfinition de __str__"""
-        for pos, element in enumerate(self._file):
+        for pos, element in enumerate(self._elements_tries()):
             cdc = cdc+"pos(%s): %s, "%(pos+1, element)
         return cdc[:-2]
@@ -4,51 +4,218 @@
 """
 Module concernant la compression et la décompression de Huffman
 """
+import heapq
 import io
+import math
 import sys
-from .compteur import Compteur
-from .file_de_priorite import FileDePriorite
+from collections import deque
+from .compteur import Compteur, CompteurOctets
+from .file_de_priorite import FileDePrioriteVideError
 from .code_binaire import Bit, CodeBinaire
-from .arbre_huffman import ArbreHuffman
+from .arbre_huffman import ArbreHuffman, ArbreCompact
+from .canonique import (longueurs_de_code, longueurs_limitees, taille_codee, codes_canoniques,
+                        ecrire_longueurs, lire_longueurs, entropie)
+from .decodage import TableDecodage
+from .codage import Encodeur
+from .projection import carte_ecriture, morceaux
+from .cache import CACHE, empreinte
+from .evenements import phase
 
-def statistiques(source: io.RawIOBase) -> (Compteur, int):
+class FormatHuffmanError(Exception):
+    """
+    Exception levée lorsque le flux à décompresser n'est pas dans un format connu
+    """
+
+TAILLE_BLOC_LECTURE = 1 << 20
+IDENTIFIANT_V1 = "HUFF"
+IDENTIFIANT_V2 = "HUF2"
+IDENTIFIANT_STOCKE = "HUFS"
+IDENTIFIANT_V1_LARGE = "HUF1"
+IDENTIFIANT_V2_LARGE = "HUF3"
+IDENTIFIANT_STOCKE_LARGE = "HUFL"
+LIMITE_EN_TETE = 1 << 32
+SEUIL_STOCKAGE = 1.0
+TAILLE_ECHANTILLON = 1 << 16
+ORDRE_OCTETS = "little"
+
+def histogramme(source: io.RawIOBase, taille_bloc: int = TAILLE_BLOC_LECTURE) -> ([int], int):
+    """
+    Fonction qui compte les 256 valeurs d'octets du flux source, bloc par bloc.
+    Les blocs sont lus dans un tampon réutilisé, ou directement dans la projection
+    en mémoire d'un fichier ordinaire, et comptés par un CompteurOctets (en masse
+    avec numpy.bincount si NumPy est installé).
+    """
+    longueur = 0
+    total = CompteurOctets()
+    for morceau in morceaux(source, taille_bloc):
+        total.mettre_a_jour(morceau)
+        longueur += len(morceau)
+    return (total.occurrences(), longueur)
+
+def histogramme_octets(donnees) -> [int]:
+    """
+    Fonction qui compte les 256 valeurs d'octets d'un objet de type bytes en mémoire
+    """
+    total = CompteurOctets()
+    total.mettre_a_jour(donnees)
+    return total.occurrences()
+
+def compteur_octets(occurrences: [int]) -> Compteur:
+    """
+    Fonction qui transforme les 256 nombres d'occurrences en CompteurOctets
+    """
+    return CompteurOctets(occurrences)
+
+def statistiques(source: io.RawIOBase, taille_bloc: int = TAILLE_BLOC_LECTURE) -> (Compteur, int):
     """
     Fonction de calcul des statistiques dans le cadre de la compression de Huffman
     """
-    compteur = Compteur()
     source.seek(0)
-    octet = source.read(1)
-    iterator = 0
-    while octet:
-        compteur.incrementer(octet)
-        iterator += 1
-        octet = source.read(1)
-    return (compteur, iterator)
+    (occurrences, longueur) = histogramme(source, taille_bloc)
+    return (compteur_octets(occurrences), longueur)
 
-def arbre_de_huffman(stat: Compteur) -> ArbreHuffman:
+def statistiques_echantillonnees(source: io.RawIOBase, fraction: float,
+                                 taille_echantillon: int = TAILLE_ECHANTILLON) -> (Compteur, int):
+    """
+    Fonction qui estime les statistiques du flux source, qui doit permettre seek, à partir
+    de morceaux de taille_echantillon octets régulièrement espacés, couvrant environ
+    fraction de la source. Les nombres d'occurrences sont ramenés à la taille de la source
+    et valent au moins 1, pour que les octets absents de l'échantillon restent codables.
     """
-    Fonction de calcul de l'arbre de huffman dans le cadre de la compression de Huffman
+    if not 0 < fraction <= 1:
+        raise ValueError("La fraction échantillonnée doit être dans ]0, 1]: %s" %fraction)
+    longueur = source.seek(0, io.SEEK_END)
+    pas = max(taille_echantillon, int(taille_echantillon/fraction))
+    total = CompteurOctets()
+    taille_lue = 0
+    for debut in range(0, longueur, pas):
+        source.seek(debut)
+        morceau = source.read(taille_echantillon)
+        total.mettre_a_jour(morceau)
+        taille_lue += len(morceau)
+    occurrences = [max(1, occurrence*longueur//taille_lue) if taille_lue else 0
+                   for occurrence in total.occurrences()]
+    return (compteur_octets(occurrences), longueur)
+
+def arbre_de_huffman(stat: Compteur, deux_files: bool = False) -> ArbreHuffman:
     """
-    def file_de_priorite(stat: Compteur) -> FileDePriorite:
+    Fonction de calcul de l'arbre de huffman dans le cadre de la compression de Huffman.
+    L'arbre est construit dans un ArbreCompact, dont la racine est retournée.
+    À nombre d'occurrences égal, le dernier arbre créé est défilé en premier, comme
+    avec la FileDePriorite du module file_de_priorite. Avec deux_files, l'arbre est construit en temps linéaire
+    à partir des feuilles triées par nombre d'occurrences (méthode des deux files).
+    """
+    def arbre_tas(compact: ArbreCompact):
         """
-        Fonction qui transforme un compteur en file de priorité
+        Fonction qui construit l'arbre avec un tas de (poids, -rang, indice)
         """
-        fdp = FileDePriorite()
-        for element in sorted(stat.elements):
-            fdp.enfiler(ArbreHuffman(element=element, nb_occurrences=stat.nb_occurences(element)))
-        return fdp
+        tas = [(stat.nb_occurences(element), -rang, compact.ajouter_feuille(
+                    element, stat.nb_occurences(element)))
+               for rang, element in enumerate(sorted(stat.elements))]
+        heapq.heapify(tas)
+        rang = len(tas)
+        while len(tas) > 1:
+            fils_droit = heapq.heappop(tas)[2]
+            fils_gauche = heapq.heappop(tas)[2]
+            indice = compact.ajouter_noeud(fils_gauche, fils_droit)
+            heapq.heappush(tas, (compact.poids[indice], -rang, indice))
+            rang += 1
 
-    def mise_a_jour_fdp(file):
+    def arbre_deux_files(compact: ArbreCompact):
         """
-        Fonction qui met à jour la file de priorité
+        Fonction qui construit l'arbre avec une file de feuilles triées
+        et une file de noeuds, croissante par construction.
         """
-        arbre = ArbreHuffman(fils_droit=file.defiler(), fils_gauche=file.defiler())
-        file.enfiler(arbre)
+        poids = compact.poids
+        feuilles = deque(
+            compact.ajouter_feuille(element, stat.nb_occurences(element))
+            for element in sorted(stat.elements, key=lambda e: (stat.nb_occurences(e), e)))
+        noeuds = deque()
+
+        def plus_petit():
+            """
+            Fonction qui défile le plus petit arbre des deux files, feuilles d'abord
+            """
+            if not noeuds or (feuilles and poids[feuilles[0]] <= poids[noeuds[0]]):
+                return feuilles.popleft()
+            return noeuds.popleft()
+
+        while len(feuilles) + len(noeuds) > 1:
+            fils_droit = plus_petit()
+            noeuds.append(compact.ajouter_noeud(plus_petit(), fils_droit))
+
+    if not stat.elements:
+        raise FileDePrioriteVideError("Impossible de construire l'arbre d'un compteur vide")
+    compact = ArbreCompact()
+    if deux_files:
+        arbre_deux_files(compact)
+    else:
+        arbre_tas(compact)
+    return compact.racine
+
+def longueurs_huffman(stats: Compteur, longueur_max: int = None,
+                      deux_files: bool = False) -> {bytes, int}:
+    """
+    Fonction qui retourne la longueur du code de Huffman de chaque élément de stats.
+    Si un code dépasse longueur_max bits, les longueurs optimales limitées à
+    longueur_max sont calculées par package-merge.
+    deux_files est transmis à arbre_de_huffman.
+    """
+    longueurs = longueurs_de_code(arbre_de_huffman(stats, deux_files))
+    if longueur_max is not None and max(longueurs.values()) > longueur_max:
+        longueurs = longueurs_limitees(
+            {e: stats.nb_occurences(e) for e in stats.elements}, longueur_max)
+    return longueurs
+
+def cout_limitation(stats: Compteur, longueurs: {object, int}, cout: [int]):
+    """
+    Fonction qui ajoute à cout[0] le nombre de bits des éléments de stats codés avec
+    longueurs (limitées), et à cout[1] ce nombre avec des codes de Huffman non limités
+    """
+    occurrences = {e: stats.nb_occurences(e) for e in stats.elements}
+    cout[0] += taille_codee(occurrences, longueurs)
+    cout[1] += taille_codee(occurrences, longueurs_huffman(stats))
+
+def longueurs_en_cache(stats: Compteur, longueur_max: int = None) -> {bytes, int}:
+    """
+    Fonction longueurs_huffman, mémorisée dans le cache des tables par l'empreinte de stats
+    """
+    cle = ("longueurs", empreinte({e: stats.nb_occurences(e) for e in stats.elements}),
+           longueur_max)
+    return CACHE.obtenir(cle, lambda: longueurs_huffman(stats, longueur_max))
 
-    file = file_de_priorite(stat)
-    while len(file) > 1:
-        mise_a_jour_fdp(file)
-    return file.defiler()
+def codes_en_cache(longueurs: {object, int}) -> {object, (int, int)}:
+    """
+    Fonction codes_canoniques, mémorisée dans le cache des tables par l'empreinte des longueurs
+    """
+    return CACHE.obtenir(("codes", empreinte(longueurs)), lambda: codes_canoniques(longueurs))
+
+def table_en_cache(longueurs: {object, int}, bits_par_lecture: int = 11,
+                   regrouper: bool = True) -> TableDecodage:
+    """
+    Fonction qui retourne la table de décodage des codes canoniques de longueurs,
+    mémorisée dans le cache des tables
+    """
+    cle = ("table", empreinte(longueurs), bits_par_lecture, regrouper)
+    return CACHE.obtenir(cle, lambda: TableDecodage(codes_canoniques(longueurs),
+                                                    bits_par_lecture, regrouper))
+
+def stockage_preferable(occurrences: [int], seuil: float = SEUIL_STOCKAGE,
+                        longueurs: {bytes, int} = None) -> bool:
+    """
+    Fonction qui indique si des octets ayant ces 256 nombres d'occurrences sont à stocker
+    sans codage: leur taille codée, table des longueurs comprise, dépasserait seuil fois
+    leur taille. Sans longueurs, l'entropie, qui minore la taille codée, est utilisée sans
+    construire d'arbre; avec longueurs, la taille codée exacte. seuil à None ne stocke jamais.
+    """
+    longueur = sum(occurrences)
+    if seuil is None or longueur == 0:
+        return False
+    if longueurs is None:
+        return math.ceil(entropie(occurrences)/8) > seuil*longueur
+    liste = [longueurs.get(octet.to_bytes(1, sys.byteorder), 0) for octet in range(256)]
+    bits = sum(occurrence*taille for occurrence, taille in zip(occurrences, liste))
+    return (bits+7)//8 + len(ecrire_longueurs(liste)) > seuil*longueur
 
 def code_binaire(arbre: ArbreHuffman) -> {int, CodeBinaire}:
     """
@@ -73,25 +240,42 @@ def code_binaire(arbre: ArbreHuffman) -> {int, CodeBinaire}:
         table_codage(arbre.fils_gauche, table, CodeBinaire(Bit.BIT_0))
         table_codage(arbre.fils_droit, table, CodeBinaire(Bit.BIT_1))
     else:
-        table[arbre.element] = Bit.BIT_0
+        table[arbre.element] = CodeBinaire(Bit.BIT_0)
     return table
 
-def compresser(destination: io.RawIOBase, source: io.RawIOBase):
+def compresser(destination: io.RawIOBase, source: io.RawIOBase, version: int = 2,
+               taille_bloc: int = None, nb_processus: int = 1, longueur_max: int = None,
+               contexte: bool = False, decoupage: str = None, table=None,
+               seuil_stockage: float = SEUIL_STOCKAGE, echantillonnage: float = None,
+               nb_flux: int = None, en_tete_large: bool = None):
     """
     Fonction de compression suivant la méthode d'Huffman.
+    La version 1 du format stocke les 256 nombres d'occurrences,
+    la version 2 seulement les longueurs des codes canoniques.
+    Avec une taille de bloc ou plusieurs processus, le format par blocs
+    du module blocs est utilisé. C'est aussi le cas si la source ne permet pas seek
+    (entrée standard, tube, socket): elle est alors lue en un seul passage,
+    bloc par bloc, avec une mémoire bornée.
+    longueur_max limite la longueur des codes (format v2 et blocs); le surcoût par rapport
+    aux codes de Huffman non limités est annoncé pendant la compression.
+    contexte choisit le codage en contexte d'ordre 1, et decoupage ("16bits" ou "mots")
+    le codage sur un alphabet large, tous deux dans le format par blocs.
+    nb_flux répartit les octets de chaque bloc entre autant de flux de bits entrelacés,
+    décodables en parallèle (format par blocs).
+    Les phases sont aussi annoncées aux écouteurs du module evenements.
+    table, une TableEntrainee du module dictionnaire, produit un message qui ne porte
+    que l'identifiant de la table, pour les petits fichiers.
+    Si le codage ne réduirait pas la taille en dessous de seuil_stockage fois la taille
+    d'origine (données déjà compressées ou chiffrées), les octets sont stockés tels quels
+    (format v2 et blocs); seuil_stockage à None code toujours.
+    echantillonnage, une fraction de la source, estime les statistiques du format v2
+    sur un échantillon (voir statistiques_echantillonnees) au lieu de la lire en entier;
+    il lève ValueError avec le format par blocs.
+    Les sources de 4 Gio ou plus, ou toutes avec en_tete_large, ont un en-tête dont la
+    longueur et les nombres d'occurrences sont sur 8 octets little-endian (identifiants
+    HUF1, HUF3 et HUFL au lieu de HUFF, HUF2 et HUFS), lisible quelle que soit la machine;
+    en_tete_large lève ValueError avec le format par blocs.
     """
-    def list_to_byte(liste):
-        """
-        Fonction qui transforme une liste de bits(sous forme de naturel) en un octet.
-        """
-        i = 7
-        temp = 0
-        for bit in liste:
-            temp = temp+bit*(2**i)
-            i -= 1
-        temp = int(temp).to_bytes(1, sys.byteorder)
-        return temp
-
     def identifiant_write(identifiant: str):
         """
         Fonction prend un identifiant et l'écrit dans le flux de destination.
@@ -100,21 +284,21 @@ def compresser(destination: io.RawIOBase, source: io.RawIOBase):
             temp = ord(char).to_bytes(1, sys.byteorder)
             destination.write(temp)
 
-    def longueur_write(longueur: int):
+    def longueur_write(longueur: int, ordre: str = sys.byteorder, taille: int = 4):
         """
         Fonction qui écrit la longueur des statistiques dans le flux destination.
         """
-        longueur = longueur.to_bytes(4, sys.byteorder)
+        longueur = longueur.to_bytes(taille, ordre)
         destination.write(longueur)
 
-    def stats_write_big_file(stats):
+    def stats_write_big_file(stats, ordre: str = sys.byteorder, taille: int = 4):
         """
         Fonction qui écrit chaque nombre d'occurences des statistiques dans le flux destination.
         """
         for i in range(256):
             temp_occur = stats.nb_occurences(
                 i.to_bytes(1, sys.byteorder)
-                ).to_bytes(4, sys.byteorder)
+                ).to_bytes(taille, ordre)
             destination.write(temp_occur)
 
     #def stats_write(stats):
@@ -127,70 +311,124 @@ def compresser(destination: io.RawIOBase, source: io.RawIOBase):
     #        temp_occur = stats.nb_occurences(key).to_bytes(4, sys.byteorder)
     #        destination.write(temp_occur)
 
-    def code_write(stats):
+    def longueurs_write(longueurs: {bytes, int}):
+        """
+        Fonction qui écrit la table compacte des longueurs de code dans le flux destination.
+        """
+        destination.write(ecrire_longueurs(
+            [longueurs.get(i.to_bytes(1, sys.byteorder), 0) for i in range(256)]))
+
+    def stored_write(longueur: int):
+        """
+        Fonction qui écrit les octets du flux source sans les coder
+        """
+        identifiant_write(IDENTIFIANT_STOCKE_LARGE if large else IDENTIFIANT_STOCKE)
+        longueur_write(longueur, ORDRE_OCTETS, 8 if large else 4)
+        with phase("stockage", longueur, longueur):
+            source.seek(0)
+            for morceau in morceaux(source):
+                destination.write(morceau)
+
+    def code_write(codes: {bytes, (int, int)}, taille_bloc: int = TAILLE_BLOC_LECTURE):
         """
         Fonction qui écrit les octets compressés
         à partir de la table de codage dans le flux destination.
         """
-        arbre = arbre_de_huffman(stats)
-        table = code_binaire(arbre)
-        source.seek(0)
-        byte = source.read(1)
-        temp_bit2 = []
-        while byte:
-            temp_bit = []
-            temp_bit.extend(temp_bit2)
-            temp_bit2 = []
-            while byte and len(temp_bit) < 8:
-                code = table[byte]
-                for bit in code:
-                    if len(temp_bit) < 8:
-                        temp_bit.append(int(str(bit)))
-                    else:
-                        temp_bit2.append(int(str(bit)))
-                byte = source.read(1)
-            temp_bit = list_to_byte(temp_bit)
-            destination.write(temp_bit)
+        with phase("codage") as suivi:
+            def ecrire(octets):
+                suivi.octets_ecrits += len(octets)
+                destination.write(octets)
+            encodeur = Encodeur(codes, ecrire)
+            source.seek(0)
+            lus = 0
+            for morceau in morceaux(source, taille_bloc):
+                encodeur.encoder(morceau)
+                lus += len(morceau)
+                suivi.progression(lus)
+            encodeur.terminer()
 
+    if table is not None:
+        yield "Compression avec la table %08x" %table.identifiant
+        if source.seekable():
+            source.seek(0)
+        destination.write(table.compresser(source.read()))
+        return
+    if (taille_bloc is not None or nb_processus != 1 or contexte or decoupage is not None
+            or nb_flux is not None or not source.seekable()):
+        if echantillonnage is not None:
+            raise ValueError("L'échantillonnage ne s'applique qu'au format v2, pas aux blocs")
+        if en_tete_large:
+            raise ValueError("Le format par blocs n'a pas d'en-tête large: son index est déjà sur 8 octets")
+        from .blocs import compresser_blocs, TAILLE_BLOC
+        yield from compresser_blocs(destination, source, taille_bloc or TAILLE_BLOC, nb_processus,
+                                    longueur_max=longueur_max, contexte=contexte,
+                                    decoupage=decoupage, seuil_stockage=seuil_stockage,
+                                    nb_flux=nb_flux)
+        return
+    if version not in (1, 2):
+        raise ValueError("Version de format inconnue: %s" %version)
+    if version == 1 and longueur_max is not None:
+        raise ValueError("Le format v1 ne permet pas de limiter la longueur des codes")
     yield "Compression"
-    (stats, longueur) = statistiques(source)
-    identifiant = "HUFF"
+    with phase("statistiques") as suivi:
+        if echantillonnage is None:
+            (stats, longueur) = statistiques(source)
+        else:
+            (stats, longueur) = statistiques_echantillonnees(source, echantillonnage)
+        suivi.octets_lus = longueur
     yield "Cas général"
-    if longueur == 0:
+    large = longueur >= LIMITE_EN_TETE if en_tete_large is None else en_tete_large
+    if version == 1:
+        #L'en-tête v1 d'origine est dans l'ordre des octets de la machine
+        (ordre, taille) = (ORDRE_OCTETS, 8) if large else (sys.byteorder, 4)
         yield "Ecriture de l'identifiant"
-        identifiant_write(identifiant)
+        identifiant_write(IDENTIFIANT_V1_LARGE if large else IDENTIFIANT_V1)
         yield "Ecriture de la longueur"
-        longueur_write(longueur)
+        longueur_write(longueur, ordre, taille)
         yield "Ecriture des statistiques"
-        stats_write_big_file(stats)
+        stats_write_big_file(stats, ordre, taille)
+        if longueur > 0:
+            yield "Ecriture des octets"
+            cle = ("codes v1", empreinte({e: stats.nb_occurences(e) for e in stats.elements}))
+            with phase("arbre de Huffman"):
+                codes = CACHE.obtenir(cle, lambda: arbre_de_huffman(stats).compact.codes())
+            code_write(codes)
+    elif stockage_preferable(stats.occurrences(), seuil_stockage):
+        yield "Entropie trop élevée: stockage sans codage"
+        stored_write(longueur)
     else:
+        with phase("longueurs de code"):
+            longueurs = longueurs_en_cache(stats, longueur_max) if longueur > 0 else {}
+        if stockage_preferable(stats.occurrences(), seuil_stockage, longueurs):
+            yield "Codage non rentable: stockage sans codage"
+            stored_write(longueur)
+            yield "Création du fichier compressé"
+            return
         yield "Ecriture de l'identifiant"
-        identifiant_write(identifiant)
+        identifiant_write(IDENTIFIANT_V2_LARGE if large else IDENTIFIANT_V2)
         yield "Ecriture de la longueur"
-        longueur_write(longueur)
-        yield "Ecriture des statistiques"
-        stats_write_big_file(stats)
-        yield "Ecriture des octets"
-        code_write(stats)
+        longueur_write(longueur, ORDRE_OCTETS, 8 if large else 4)
+        if longueur_max is not None and longueur > 0:
+            occurrences = {e: stats.nb_occurences(e) for e in stats.elements}
+            taille_limitee = taille_codee(occurrences, longueurs)
+            taille_libre = taille_codee(occurrences, longueurs_de_code(arbre_de_huffman(stats)))
+            yield ("Codes limités à %d bits: %d bits au lieu de %d (+%.3f%%)"
+                   %(longueur_max, taille_limitee, taille_libre,
+                     100*(taille_limitee-taille_libre)/taille_libre))
+        yield "Ecriture des longueurs de code"
+        longueurs_write(longueurs)
+        if longueur > 0:
+            yield "Ecriture des octets"
+            code_write(codes_en_cache(longueurs))
     yield "Création du fichier compressé"
 
-def decompresser(destination: io.RawIOBase, source: io.RawIOBase):
+def decompresser(destination: io.RawIOBase, source: io.RawIOBase, nb_processus: int = 1,
+                 tables=None):
     """
     Fonction qui permet la décompression selon la méthode de Huffman.
+    nb_processus ne concerne que le format par blocs, tables contient les
+    tables entraînées parmi lesquelles choisir celle d'un message.
     """
-    def naturel_to_list(naturel):
-        """
-        Fonction qui permet de passer d'un naturel à une liste de Bit.
-        """
-        liste = []
-        while naturel != 0:
-            liste.append(Bit.BIT_0 if naturel%2 == 0 else Bit.BIT_1)
-            naturel = naturel // 2
-        if len(liste) < 8:
-            liste += [Bit.BIT_0 for i in range(8-len(liste))]
-        liste.reverse()
-        return liste
-
     def recherche_identifiant():
         """
         Fonction qui recherche l'identifiant du flux source.
@@ -200,53 +438,98 @@ def decompresser(destination: io.RawIOBase, source: io.RawIOBase):
             identifiant = identifiant + chr(int.from_bytes(source.read(1), sys.byteorder))
         return identifiant
 
-    def recherche_stats():
+    def recherche_stats(ordre: str = sys.byteorder, taille: int = 4):
         """
         Fonction qui recherche les nombres d'occurences des 256 octets dans le flux source.
         """
-        stat = Compteur()
+        stat = CompteurOctets()
         for i in range(256):
-            occurence = int.from_bytes(source.read(4), sys.byteorder)
+            occurence = int.from_bytes(source.read(taille), ordre)
             if occurence > 0:
                 stat.fixer(i.to_bytes(1, sys.byteorder), occurence)
         return stat
 
-    def reconstruction():
+    def recherche_longueurs():
+        """
+        Fonction qui lit la table des longueurs de code du flux source.
+        """
+        longueurs = lire_longueurs(source)
+        return {i.to_bytes(1, sys.byteorder): l for i, l in enumerate(longueurs) if l > 0}
+
+    def reconstruction(table: TableDecodage, longueur: int):
         """
-        Fonction qui reconstruit le contenu du flux source
-        avant compression à partir de l'arbre obtenu des statistiques.
+        Fonction qui reconstruit le contenu du flux source avant compression
+        à l'aide d'une table de décodage. Si destination est un
+        fichier ordinaire ouvert en lecture-écriture, il est agrandi à sa taille finale
+        et les octets sont écrits directement dans sa projection en mémoire.
         """
-        octet = source.read(1)
-        arbre_courant = arbre
-        longueur_courante = 0
-        while longueur_courante < longueur and octet:
-            liste_bits = naturel_to_list(int.from_bytes(octet, sys.byteorder))
-            for i in liste_bits:
-                if arbre_courant.est_une_feuille:
-                    destination.write(arbre_courant.element)
-                    arbre_courant = arbre
-                    longueur_courante += 1
-                if i == Bit.BIT_0:
-                    arbre_courant = arbre_courant.fils_gauche
-                else:
-                    arbre_courant = arbre_courant.fils_droit
-            octet = source.read(1)
+        with phase("décodage", octets_ecrits=longueur) as suivi:
+            debut = source.tell() if source.seekable() else None
+            carte = carte_ecriture(destination, longueur)
+            if carte is None:
+                table.decoder(source, destination, longueur)
+            else:
+                with carte:
+                    table.decoder(source, carte, longueur)
+                    position = carte.tell()
+                destination.seek(position)
+            if debut is not None:
+                suivi.octets_lus = source.tell() - debut
 
     yield "Décompression"
-    source.seek(0)
+    if source.seekable():
+        source.seek(0)
     yield "Cas général"
     identifiant = recherche_identifiant()
-    if identifiant == "HUFF":
-        longueur = int.from_bytes(source.read(4), sys.byteorder)
+    if identifiant in (IDENTIFIANT_V1, IDENTIFIANT_V1_LARGE):
+        (ordre, taille) = ((ORDRE_OCTETS, 8) if identifiant == IDENTIFIANT_V1_LARGE
+                           else (sys.byteorder, 4))
+        longueur = int.from_bytes(source.read(taille), ordre)
         yield "Lecture des stats"
-        stat = recherche_stats()
-        yield "Création de l'arbre de Huffman"
-        arbre = arbre_de_huffman(stat)
-        yield "Création du fichier decompressé"
-        reconstruction()
+        stat = recherche_stats(ordre, taille)
+        if longueur > 0:
+            yield "Création de l'arbre de Huffman et de la table de décodage"
+            cle = ("table v1", empreinte({e: stat.nb_occurences(e) for e in stat.elements}))
+            with phase("table de décodage"):
+                table = CACHE.obtenir(
+                    cle, lambda: TableDecodage(arbre_de_huffman(stat).compact.codes()))
+            yield "Création du fichier decompressé"
+            reconstruction(table, longueur)
+    elif identifiant in (IDENTIFIANT_V2, IDENTIFIANT_V2_LARGE):
+        longueur = int.from_bytes(source.read(8 if identifiant == IDENTIFIANT_V2_LARGE else 4),
+                                  ORDRE_OCTETS)
+        yield "Lecture des longueurs de code"
+        longueurs = recherche_longueurs()
+        if longueur > 0:
+            yield "Création de la table de décodage"
+            with phase("table de décodage"):
+                table = table_en_cache(longueurs)
+            yield "Création du fichier decompressé"
+            reconstruction(table, longueur)
+    elif identifiant in (IDENTIFIANT_STOCKE, IDENTIFIANT_STOCKE_LARGE):
+        longueur = int.from_bytes(
+            source.read(8 if identifiant == IDENTIFIANT_STOCKE_LARGE else 4), ORDRE_OCTETS)
+        yield "Copie des octets stockés"
+        with phase("copie", longueur, longueur):
+            for morceau in morceaux(source):
+                destination.write(morceau[:longueur])
+                longueur -= len(morceau)
+                if longueur <= 0:
+                    break
+        if longueur > 0:
+            raise FormatHuffmanError("Données stockées tronquées: %d octets manquants" %longueur)
+    elif identifiant == "HUFB":
+        from .blocs import decompresser_blocs
+        yield from decompresser_blocs(destination, source, nb_processus)
+    elif identifiant == "HUFD":
+        from .dictionnaire import decompresser_message
+        yield "Décodage avec une table entraînée"
+        destination.write(decompresser_message(b"HUFD" + source.read(), tables))
+    else:
+        raise FormatHuffmanError("Identifiant de fichier inconnu: %r" %identifiant)
 
 if __name__ == "__main__":
-    F = io.StringIO("azzeeerrrrttttt")
+    F = io.BytesIO(b"azzeeerrrrttttt")
     (STAT, I) = statistiques(F)
     ARBRE = arbre_de_huffman(STAT)
     TABLE = code_binaire(ARBRE)
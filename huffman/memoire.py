@@ -0,0 +1,280 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant la compression en mémoire: fonctions qui prennent et retournent des
+octets, sans flux ni messages de progression, et objets Compresseur et Decompresseur
+qui traitent les données morceau par morceau, avec une mémoire bornée, dans le format
+par blocs.
+"""
+
+import io
+from .blocs import (IDENTIFIANT_BLOCS, TAILLE_BLOC, TAILLE_BLOC_MAX, TAILLE_EN_TETE_BLOC,
+                    BLOC_FIN, EntreeIndex, compresser_bloc, decompresser_bloc, ecrire_index)
+from .canonique import ecrire_longueurs, lire_longueurs
+from .codage import Encodeur
+from .huffman import (FormatHuffmanError, IDENTIFIANT_V2, IDENTIFIANT_STOCKE, ORDRE_OCTETS,
+                      IDENTIFIANT_V2_LARGE, IDENTIFIANT_STOCKE_LARGE, LIMITE_EN_TETE,
+                      SEUIL_STOCKAGE, compresser, decompresser, histogramme_octets,
+                      compteur_octets, longueurs_en_cache, codes_en_cache, table_en_cache,
+                      stockage_preferable)
+
+def compresser_octets(donnees, **options) -> bytes:
+    """
+    Fonction qui compresse un objet de type bytes (bytes, bytearray, memoryview, array...)
+    et retourne le résultat. Sans option, le format v2 est produit directement à partir
+    des données; les options de compresser (taille_bloc, contexte...) sont acceptées.
+    """
+    vue = memoryview(donnees).cast("B")
+    if set(options) - {"longueur_max", "seuil_stockage", "en_tete_large"}:
+        destination = io.BytesIO()
+        for _ in compresser(destination, io.BytesIO(vue), **options):
+            pass
+        return destination.getvalue()
+    longueur_max = options.get("longueur_max")
+    seuil_stockage = options.get("seuil_stockage", SEUIL_STOCKAGE)
+    large = options.get("en_tete_large")
+    if large is None:
+        large = len(vue) >= LIMITE_EN_TETE
+    taille_longueur = 8 if large else 4
+    occurrences = histogramme_octets(vue)
+    stocke = ((IDENTIFIANT_STOCKE_LARGE if large else IDENTIFIANT_STOCKE).encode("ascii")
+              + len(vue).to_bytes(taille_longueur, ORDRE_OCTETS))
+    if stockage_preferable(occurrences, seuil_stockage):
+        return stocke + vue
+    longueurs = (longueurs_en_cache(compteur_octets(occurrences), longueur_max)
+                 if len(vue) > 0 else {})
+    if stockage_preferable(occurrences, seuil_stockage, longueurs):
+        return stocke + vue
+    sortie = [(IDENTIFIANT_V2_LARGE if large else IDENTIFIANT_V2).encode("ascii")
+              + len(vue).to_bytes(taille_longueur, ORDRE_OCTETS),
+              ecrire_longueurs([longueurs.get(bytes([i]), 0) for i in range(256)])]
+    if len(vue) > 0:
+        encodeur = Encodeur(codes_en_cache(longueurs), sortie.append)
+        encodeur.encoder(vue)
+        encodeur.terminer()
+    return b"".join(sortie)
+
+def decompresser_octets(donnees, tables=None) -> bytes:
+    """
+    Fonction qui décompresse un objet de type bytes et retourne les octets d'origine.
+    Les formats v2, stocké et par blocs, avec un en-tête de 4 ou 8 octets, sont décodés
+    directement dans les données; tables est transmis à decompresser pour les messages
+    compressés avec une table entraînée.
+    """
+    vue = memoryview(donnees).cast("B")
+    identifiant = bytes(vue[:4]).decode("latin-1")
+    debut = 12 if identifiant in (IDENTIFIANT_V2_LARGE, IDENTIFIANT_STOCKE_LARGE) else 8
+    if identifiant in (IDENTIFIANT_V2, IDENTIFIANT_V2_LARGE):
+        longueur = int.from_bytes(vue[4:debut], ORDRE_OCTETS)
+        flux = io.BytesIO(vue[debut:debut+2*256+1])
+        longueurs = {bytes([i]): l for i, l in enumerate(lire_longueurs(flux)) if l > 0}
+        if longueur == 0:
+            return b""
+        return table_en_cache(longueurs).decoder_octets(vue[debut+flux.tell():], longueur)
+    if identifiant in (IDENTIFIANT_STOCKE, IDENTIFIANT_STOCKE_LARGE):
+        longueur = int.from_bytes(vue[4:debut], ORDRE_OCTETS)
+        if len(vue) < debut + longueur:
+            raise FormatHuffmanError("Données stockées tronquées: %d octets manquants"
+                                     %(debut + longueur - len(vue)))
+        return bytes(vue[debut:debut+longueur])
+    if identifiant == IDENTIFIANT_BLOCS:
+        decompresseur = Decompresseur()
+        resultat = decompresseur.decompresser(vue)
+        if not decompresseur.fin:
+            raise FormatHuffmanError("Flux par blocs tronqué")
+        return resultat
+    destination = io.BytesIO()
+    for _ in decompresser(destination, io.BytesIO(vue), tables=tables):
+        pass
+    return destination.getvalue()
+
+class Compresseur(object):
+    """
+    Compression incrémentale dans le format par blocs: les octets reçus sont accumulés
+    jusqu'à former un bloc de taille_bloc octets, qui est alors compressé et retourné.
+    Les blocs peuvent aussi être compressés ailleurs (compresser_bloc dans un autre
+    processus): decouper et vider retournent les blocs à compresser, ajouter enregistre
+    leurs résultats dans l'ordre.
+    """
+
+    def __init__(self, taille_bloc: int = TAILLE_BLOC, **options):
+        """
+        Les options sont transmises à compresser_bloc (longueur_max, contexte, decoupage)
+        """
+        if not 0 < taille_bloc <= TAILLE_BLOC_MAX:
+            raise ValueError("La taille de bloc doit être entre 1 et %d: %d"
+                             %(TAILLE_BLOC_MAX, taille_bloc))
+        self._taille_bloc = taille_bloc
+        self.options = options
+        self._tampon = bytearray()
+        self._index = []
+        self._position_compressee = len(IDENTIFIANT_BLOCS)
+        self._position_originale = 0
+        self._debut_ecrit = False
+        self._termine = False
+
+    def decouper(self, morceau) -> [bytes]:
+        """
+        Méthode qui ajoute un morceau et retourne les blocs complets, retirés du tampon,
+        à compresser avec compresser_bloc(bloc, **options)
+        """
+        if self._termine:
+            raise ValueError("Compresseur déjà terminé")
+        self._tampon += morceau
+        blocs = []
+        debut = 0
+        while len(self._tampon) - debut >= self._taille_bloc:
+            blocs.append(bytes(self._tampon[debut:debut+self._taille_bloc]))
+            debut += self._taille_bloc
+        del self._tampon[:debut]
+        return blocs
+
+    def vider(self) -> bytes:
+        """
+        Méthode qui retourne et retire les octets en attente, le dernier bloc incomplet
+        """
+        reste = bytes(self._tampon)
+        self._tampon = bytearray()
+        return reste
+
+    def ajouter(self, enregistrement: bytes, taille_originale: int) -> bytes:
+        """
+        Méthode qui ajoute à l'index l'enregistrement d'un bloc de taille_originale octets
+        et retourne les octets à écrire
+        """
+        if self._termine:
+            raise ValueError("Compresseur déjà terminé")
+        sortie = self._debut()
+        sortie.append(enregistrement)
+        self._index.append(EntreeIndex(self._position_compressee, self._position_originale,
+                                       len(enregistrement), taille_originale))
+        self._position_compressee += len(enregistrement)
+        self._position_originale += taille_originale
+        return b"".join(sortie)
+
+    def _debut(self) -> [bytes]:
+        """
+        Méthode privée qui retourne l'identifiant, la première fois seulement
+        """
+        if self._debut_ecrit:
+            return []
+        self._debut_ecrit = True
+        return [IDENTIFIANT_BLOCS.encode("ascii")]
+
+    def compresser(self, morceau) -> bytes:
+        """
+        Méthode qui ajoute un morceau et retourne les blocs compressés disponibles,
+        éventuellement aucun
+        """
+        sortie = self._debut()
+        for bloc in self.decouper(morceau):
+            sortie.append(self.ajouter(compresser_bloc(bloc, **self.options), len(bloc)))
+        return b"".join(sortie)
+
+    def terminer(self) -> bytes:
+        """
+        Méthode qui retourne le dernier bloc, le marqueur de fin et l'index
+        """
+        if self._termine:
+            raise ValueError("Compresseur déjà terminé")
+        sortie = self._debut()
+        reste = self.vider()
+        if reste:
+            sortie.append(self.ajouter(compresser_bloc(reste, **self.options), len(reste)))
+        sortie.append(bytes([BLOC_FIN]) + ecrire_index(self._index))
+        self._termine = True
+        return b"".join(sortie)
+
+class Decompresseur(object):
+    """
+    Décompression incrémentale du format par blocs. Un bloc n'est décodé que lorsque
+    son enregistrement est complet et que les octets déjà décodés ne suffisent pas.
+    Les blocs peuvent aussi être décodés ailleurs: enregistrements retourne les
+    enregistrements complets, à passer à decompresser_bloc.
+    """
+
+    def __init__(self):
+        """Méthode d'initialisation de la classe Decompresseur"""
+        self._entree = bytearray()
+        self._sortie = bytearray()
+        self._identifiant_lu = False
+        self.fin = False
+
+    def _bloc_suivant(self) -> bool:
+        """
+        Méthode privée qui décode le prochain bloc complet. Retourne False s'il manque
+        des octets ou si le marqueur de fin est atteint.
+        """
+        enregistrement = self._enregistrement_suivant()
+        if enregistrement is None:
+            return False
+        self._sortie += decompresser_bloc(*enregistrement)
+        return True
+
+    def _enregistrement_suivant(self) -> (int, int, bytes):
+        """
+        Méthode privée qui retire le prochain enregistrement complet (type, taille d'origine,
+        charge). Retourne None s'il manque des octets ou si le marqueur de fin est atteint.
+        """
+        entree = self._entree
+        if not self._identifiant_lu:
+            if len(entree) < len(IDENTIFIANT_BLOCS):
+                return None
+            if bytes(entree[:len(IDENTIFIANT_BLOCS)]) != IDENTIFIANT_BLOCS.encode("ascii"):
+                raise FormatHuffmanError("Ce n'est pas un flux par blocs")
+            del entree[:len(IDENTIFIANT_BLOCS)]
+            self._identifiant_lu = True
+        if not entree:
+            return None
+        if entree[0] == BLOC_FIN:
+            #L'index qui suit ne sert qu'à l'accès direct
+            self.fin = True
+            self._entree = bytearray()
+            return None
+        if len(entree) < TAILLE_EN_TETE_BLOC:
+            return None
+        taille_originale = int.from_bytes(entree[1:5], ORDRE_OCTETS)
+        fin_bloc = TAILLE_EN_TETE_BLOC + int.from_bytes(entree[5:9], ORDRE_OCTETS)
+        if len(entree) < fin_bloc:
+            return None
+        enregistrement = (entree[0], taille_originale, bytes(entree[TAILLE_EN_TETE_BLOC:fin_bloc]))
+        del entree[:fin_bloc]
+        return enregistrement
+
+    def enregistrements(self, morceau) -> [(int, int, bytes)]:
+        """
+        Méthode qui ajoute un morceau compressé et retourne les enregistrements complets
+        (type, taille d'origine, charge) sans les décoder
+        """
+        if not self.fin:
+            self._entree += morceau
+        resultat = []
+        enregistrement = self._enregistrement_suivant()
+        while enregistrement is not None:
+            resultat.append(enregistrement)
+            enregistrement = self._enregistrement_suivant()
+        return resultat
+
+    def decompresser(self, morceau, longueur_max: int = 0) -> bytes:
+        """
+        Méthode qui ajoute un morceau compressé et retourne les octets décodés disponibles,
+        au plus longueur_max s'il est positif. Les octets décodés en trop sont retournés
+        par les appels suivants, qui peuvent se faire avec un morceau vide. Après le
+        marqueur de fin, les morceaux (l'index) sont ignorés.
+        """
+        if not self.fin:
+            self._entree += morceau
+        while (longueur_max <= 0 or len(self._sortie) < longueur_max) and self._bloc_suivant():
+            pass
+        if self._identifiant_lu and self._entree[:1] == bytes([BLOC_FIN]):
+            self._bloc_suivant()
+        taille = len(self._sortie) if longueur_max <= 0 else min(longueur_max, len(self._sortie))
+        resultat = bytes(self._sortie[:taille])
+        del self._sortie[:taille]
+        return resultat
+
+    @property
+    def en_attente(self) -> int:
+        """Nombre d'octets décodés qui n'ont pas encore été retournés"""
+        return len(self._sortie)
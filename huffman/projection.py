@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant la projection en mémoire (mmap) des fichiers ordinaires:
+lecture sans copie des fichiers à traiter et écriture directe dans un fichier
+de sortie dont la taille est connue d'avance.
+"""
+
+import io
+import mmap
+import os
+import stat
+
+TAILLE_MORCEAU = 1 << 20
+
+def carte_lecture(fichier) -> mmap.mmap:
+    """
+    Fonction qui projette en lecture un fichier ordinaire non vide.
+    Retourne None pour tout autre flux (tube, socket, BytesIO...).
+    """
+    try:
+        descripteur = fichier.fileno()
+        etat = os.fstat(descripteur)
+    except (AttributeError, OSError, ValueError):
+        return None
+    if not stat.S_ISREG(etat.st_mode) or etat.st_size == 0:
+        return None
+    try:
+        return mmap.mmap(descripteur, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+def carte_ecriture(fichier, taille: int) -> mmap.mmap:
+    """
+    Fonction qui agrandit un fichier ordinaire ouvert en lecture-écriture pour recevoir
+    taille octets à partir de sa position courante, et le projette en écriture.
+    La carte retournée est placée à cette position. Retourne None si c'est impossible.
+    """
+    if taille <= 0:
+        return None
+    try:
+        descripteur = fichier.fileno()
+        if not stat.S_ISREG(os.fstat(descripteur).st_mode) or not fichier.readable():
+            return None
+        fichier.flush()
+        position = fichier.tell()
+        fichier.truncate(position+taille)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+    try:
+        carte = mmap.mmap(descripteur, position+taille, access=mmap.ACCESS_WRITE)
+    except (OSError, ValueError):
+        fichier.truncate(position)
+        return None
+    carte.seek(position)
+    return carte
+
+def morceaux(source, taille_morceau: int = TAILLE_MORCEAU):
+    """
+    Générateur des morceaux du flux source, de sa position courante jusqu'à la fin,
+    sous forme de memoryview. Un fichier ordinaire est projeté en mémoire et découpé
+    sans copie; les autres flux sont lus dans un tampon réutilisé. Une vue n'est valable
+    que jusqu'à la demande du morceau suivant.
+    """
+    carte = carte_lecture(source)
+    if carte is None:
+        tampon = bytearray(taille_morceau)
+        vue = memoryview(tampon)
+        nb_lus = source.readinto(vue)
+    else:
+        vue = memoryview(carte)
+        debut = source.tell()
+        nb_lus = min(taille_morceau, len(carte)-debut)
+    try:
+        while nb_lus > 0:
+            morceau = vue[:nb_lus] if carte is None else vue[debut:debut+nb_lus]
+            try:
+                yield morceau
+            finally:
+                morceau.release()
+            if carte is None:
+                nb_lus = source.readinto(vue)
+            else:
+                debut += nb_lus
+                nb_lus = min(taille_morceau, len(carte)-debut)
+    finally:
+        vue.release()
+        if carte is not None:
+            carte.close()
+            source.seek(0, io.SEEK_END)
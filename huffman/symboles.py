@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Module concernant le codage sur un alphabet large: au lieu des 256 octets, les symboles
+sont des mots de 16 bits ou des lexèmes (mots et suites d'espaces) produits par un découpage.
+La concaténation des symboles redonne toujours les octets d'origine.
+
+Données d'un bloc: le dictionnaire des symboles, puis les données codées. Le dictionnaire
+donne la longueur de code maximale, le nombre de symboles de chaque longueur, puis les
+symboles dans l'ordre canonique, chacun écrit par rapport au précédent (longueur du préfixe
+commun, longueur et octets du suffixe), avec des entiers de taille variable.
+"""
+
+import io
+import re
+from collections import Counter
+from .canonique import codes_canoniques
+from .codage import EncodeurSymboles
+from .compteur import Compteur
+from .decodage import TableDecodage
+from .entiers import ecrire_entier, lire_entier
+from .huffman import cout_limitation, longueurs_huffman
+
+LEXEMES = re.compile(rb"\s+|\S+")
+
+def decouper_16_bits(donnees) -> [bytes]:
+    """
+    Fonction qui découpe des octets en symboles de 16 bits; un dernier octet isolé
+    forme un symbole à lui seul
+    """
+    donnees = bytes(donnees)
+    return [donnees[i:i+2] for i in range(0, len(donnees), 2)]
+
+def decouper_mots(donnees) -> [bytes]:
+    """
+    Fonction qui découpe des octets en mots et en suites d'espaces
+    """
+    return LEXEMES.findall(bytes(donnees))
+
+DECOUPAGES = {"16bits": decouper_16_bits, "mots": decouper_mots}
+
+def ecrire_dictionnaire(longueurs: {bytes, int}) -> bytes:
+    """
+    Fonction qui encode les symboles et leurs longueurs de code
+    """
+    longueur_max = max(longueurs.values(), default=0)
+    morceaux = [ecrire_entier(longueur_max)]
+    nombres = [0]*(longueur_max+1)
+    for longueur in longueurs.values():
+        nombres[longueur] += 1
+    morceaux += [ecrire_entier(nombre) for nombre in nombres[1:]]
+    precedent = b""
+    for (longueur, symbole) in sorted((l, s) for s, l in longueurs.items()):
+        commun = 0
+        while (commun < len(symbole) and commun < len(precedent)
+               and symbole[commun] == precedent[commun]):
+            commun += 1
+        morceaux += [ecrire_entier(commun), ecrire_entier(len(symbole)-commun), symbole[commun:]]
+        precedent = symbole
+    return b"".join(morceaux)
+
+def lire_dictionnaire(source) -> {bytes, int}:
+    """
+    Fonction qui lit dans le flux source un dictionnaire écrit par ecrire_dictionnaire
+    """
+    longueur_max = lire_entier(source)
+    nombres = [lire_entier(source) for _ in range(longueur_max)]
+    longueurs = {}
+    precedent = b""
+    for longueur, nombre in enumerate(nombres, 1):
+        for _ in range(nombre):
+            commun = lire_entier(source)
+            suffixe = source.read(lire_entier(source))
+            precedent = precedent[:commun] + suffixe
+            longueurs[precedent] = longueur
+    return longueurs
+
+def compresser_symboles(donnees, decoupage: str, longueur_max: int = None,
+                        cout: [int] = None) -> bytes:
+    """
+    Fonction qui découpe des octets en symboles selon decoupage ("16bits" ou "mots"),
+    les code et retourne le dictionnaire suivi des données codées. Avec longueur_max,
+    les bits codés avec et sans limite sont ajoutés à cout (voir cout_limitation).
+    """
+    symboles = DECOUPAGES[decoupage](donnees)
+    if not symboles:
+        return ecrire_dictionnaire({})
+    compteur = Compteur()
+    for symbole, nombre in Counter(symboles).items():
+        compteur.fixer(symbole, nombre)
+    longueurs = longueurs_huffman(compteur, longueur_max, deux_files=True)
+    if cout is not None and longueur_max is not None:
+        cout_limitation(compteur, longueurs, cout)
+    morceaux = [ecrire_dictionnaire(longueurs)]
+    encodeur = EncodeurSymboles(codes_canoniques(longueurs), morceaux.append)
+    encodeur.encoder(symboles)
+    encodeur.terminer()
+    return b"".join(morceaux)
+
+def decompresser_symboles(charge: bytes, longueur: int) -> bytes:
+    """
+    Fonction qui décode les longueur premiers octets à partir du dictionnaire et des données
+    """
+    flux = io.BytesIO(charge)
+    longueurs = lire_dictionnaire(flux)
+    if longueur == 0:
+        return b""
+    table = TableDecodage(codes_canoniques(longueurs))
+    return table.decoder_octets(charge[flux.tell():], longueur)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests du module asynchrone: aller-retour par un serveur d'écho local
+"""
+
+import asyncio
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from huffman.asynchrone import compresser_async, decompresser_async
+from huffman.huffman import FormatHuffmanError
+from huffman.memoire import compresser_octets, decompresser_octets
+
+DONNEES = bytes(random.Random(0).choices(b"azertyuiop \n", k=600000))
+
+async def morceaux(donnees, taille=10000):
+    """Itérateur asynchrone de morceaux de données"""
+    for debut in range(0, len(donnees), taille):
+        yield donnees[debut:debut+taille]
+
+async def echo(donnees, executeur):
+    """
+    Compresse donnees vers un serveur qui les décompresse et les renvoie; retourne l'écho
+    """
+    async def servir(lecteur, ecrivain):
+        await decompresser_async(lecteur, ecrivain, executeur)
+        ecrivain.close()
+        await ecrivain.wait_closed()
+
+    serveur = await asyncio.start_server(servir, "127.0.0.1", 0)
+    port = serveur.sockets[0].getsockname()[1]
+    lecteur, ecrivain = await asyncio.open_connection("127.0.0.1", port)
+
+    async def envoi():
+        await compresser_async(morceaux(donnees), ecrivain, 1 << 16, executeur)
+        ecrivain.write_eof()
+    (_, recu) = await asyncio.gather(envoi(), lecteur.read())
+    ecrivain.close()
+    serveur.close()
+    await serveur.wait_closed()
+    return recu
+
+#Des processus créés par fork après l'ouverture des sockets en garderaient une copie,
+#et la fermeture du serveur ne serait jamais vue par le client
+@pytest.mark.parametrize("fabrique", [lambda: None, lambda: ThreadPoolExecutor(2),
+                                      lambda: ProcessPoolExecutor(
+                                          2, multiprocessing.get_context("spawn"))],
+                         ids=["defaut", "fils", "processus"])
+def test_echo(fabrique):
+    executeur = fabrique()
+    try:
+        assert asyncio.run(echo(DONNEES, executeur)) == DONNEES
+    finally:
+        if executeur is not None:
+            executeur.shutdown()
+
+def test_compression_processus_lisible():
+    class Ecrivain(object):
+        def __init__(self):
+            self.octets = bytearray()
+        def write(self, octets):
+            self.octets += octets
+        async def drain(self):
+            pass
+
+    async def compresser(executeur):
+        ecrivain = Ecrivain()
+        await compresser_async(morceaux(DONNEES), ecrivain, 1 << 16, executeur)
+        return bytes(ecrivain.octets)
+    with ProcessPoolExecutor(2) as executeur:
+        compresse = asyncio.run(compresser(executeur))
+    assert decompresser_octets(compresse) == DONNEES
+
+def test_flux_tronque():
+    compresse = compresser_octets(DONNEES, taille_bloc=1 << 16)
+
+    class Ecrivain(object):
+        def write(self, octets):
+            pass
+        async def drain(self):
+            pass
+    with pytest.raises(FormatHuffmanError):
+        asyncio.run(decompresser_async(morceaux(compresse[:len(compresse)//2]), Ecrivain()))
+
+async def liste_async(liste):
+    """Itérateur asynchrone des morceaux d'une liste"""
+    for morceau in liste:
+        yield morceau
+
+@pytest.mark.parametrize("coupe", [0, 1, 2, 3, 4, 5], ids=lambda coupe: "coupe%d" % coupe)
+def test_identifiant_coupe(coupe):
+    #L'identifiant arrive en plusieurs morceaux, éventuellement après un morceau vide
+    compresse = compresser_octets(DONNEES, taille_bloc=1 << 16)
+
+    class Ecrivain(object):
+        def __init__(self):
+            self.octets = bytearray()
+        def write(self, octets):
+            self.octets += octets
+        async def drain(self):
+            pass
+    ecrivain = Ecrivain()
+    liste = [b"", compresse[:coupe], compresse[coupe:]]
+    taille = asyncio.run(asyncio.wait_for(decompresser_async(liste_async(liste), ecrivain), 60))
+    assert taille == len(DONNEES)
+    assert bytes(ecrivain.octets) == DONNEES
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests de la lecture d'une plage d'octets dans le format par blocs (lire_plage)
+"""
+
+import io
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from huffman.blocs import lire_index, lire_plage
+from huffman.memoire import compresser_octets
+
+TAILLE_BLOC = 1000
+DONNEES = bytes(random.Random(0).choices(b"azertyuiop \n", k=10000))
+#Le dernier bloc, plus court, est stocké tel quel
+DONNEES += random.Random(1).randbytes(800)
+
+PLAGES = [(0, 0), (0, 10), (5, 990), (0, TAILLE_BLOC), (TAILLE_BLOC-1, 2),
+          (TAILLE_BLOC, TAILLE_BLOC), (950, 2100), (123, 7777), (0, len(DONNEES)),
+          (len(DONNEES)-10, 10)]
+HORS_FICHIER = [(len(DONNEES)-5, 100), (len(DONNEES), 10), (len(DONNEES)+1000, 10),
+                (0, 2*len(DONNEES))]
+
+def archive(**options) -> io.BytesIO:
+    """Archive par blocs de DONNEES"""
+    return io.BytesIO(compresser_octets(DONNEES, taille_bloc=TAILLE_BLOC, **options))
+
+@pytest.mark.parametrize("options", [{}, {"contexte": True}, {"nb_flux": 3}],
+                         ids=["huffman", "contexte", "entrelace"])
+@pytest.mark.parametrize("plage", PLAGES + HORS_FICHIER, ids=str)
+def test_plage(options, plage):
+    (debut, taille) = plage
+    assert lire_plage(archive(**options), debut, taille) == DONNEES[debut:debut+taille]
+
+def test_index_reutilise():
+    source = archive()
+    index = lire_index(source)
+    assert len(index) == -(-len(DONNEES) // TAILLE_BLOC)
+    for (debut, taille) in PLAGES + HORS_FICHIER:
+        assert lire_plage(source, debut, taille, index) == DONNEES[debut:debut+taille]
+
+@pytest.mark.parametrize("plage", [(-1, 10), (0, -1)])
+def test_plage_invalide(plage):
+    with pytest.raises(ValueError):
+        lire_plage(archive(), *plage)
+
+@pytest.mark.parametrize("fabrique", [lambda: ThreadPoolExecutor(3),
+                                      lambda: ProcessPoolExecutor(2)],
+                         ids=["fils", "processus"])
+def test_plage_entrelacee_executeur(fabrique):
+    source = archive(nb_flux=4)
+    index = lire_index(source)
+    with fabrique() as executeur:
+        for (debut, taille) in PLAGES + HORS_FICHIER:
+            assert (lire_plage(source, debut, taille, index, executeur)
+                    == DONNEES[debut:debut+taille])
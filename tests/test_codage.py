@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests de l'encodeur: le codage vectorisé avec NumPy doit produire exactement les mêmes
+octets que le codage scalaire
+"""
+
+import random
+import pytest
+from huffman.canonique import codes_canoniques
+from huffman.codage import Encodeur, LONGUEUR_MAX_VECTORISE
+from huffman.compteur import CompteurOctets
+from huffman.huffman import longueurs_huffman
+
+pytest.importorskip("numpy")
+
+def encoder(codes, morceaux, vectorise) -> bytes:
+    """Encode les morceaux successifs et retourne le flux complet"""
+    sortie = []
+    encodeur = Encodeur(codes, sortie.append, vectorise=vectorise)
+    for morceau in morceaux:
+        encodeur.encoder(morceau)
+    encodeur.terminer()
+    return b"".join(sortie)
+
+def decouper(donnees: bytes, generateur: random.Random) -> [bytes]:
+    """Découpe les données en morceaux de tailles aléatoires, éventuellement vides"""
+    coupes = sorted(generateur.randint(0, len(donnees)) for _ in range(generateur.randint(0, 6)))
+    bornes = [0] + coupes + [len(donnees)]
+    return [donnees[debut:fin] for debut, fin in zip(bornes, bornes[1:])]
+
+def longueurs_peigne(longueur_max: int) -> {bytes, int}:
+    """Code complet dont les longueurs vont de 1 à longueur_max (deux codes de longueur_max)"""
+    longueurs = {bytes([i]): i + 1 for i in range(longueur_max)}
+    longueurs[bytes([longueur_max])] = longueur_max
+    return longueurs
+
+@pytest.mark.parametrize("graine", range(150))
+def test_tables_aleatoires(graine):
+    generateur = random.Random(graine)
+    symboles = generateur.sample(range(256), generateur.randint(1, 256))
+    occurrences = [0]*256
+    for symbole in symboles:
+        occurrences[symbole] = generateur.choice([1, 2, 10, 1000, 10**6])
+    longueur_max = generateur.choice([None, 9, 15, 30, LONGUEUR_MAX_VECTORISE])
+    if longueur_max is not None:
+        longueur_max = max(longueur_max, (len(symboles)-1).bit_length())
+    codes = codes_canoniques(longueurs_huffman(CompteurOctets(occurrences), longueur_max))
+    donnees = bytes(generateur.choices(symboles, k=generateur.randint(0, 100000)))
+    morceaux = decouper(donnees, generateur)
+    scalaire = encoder(codes, morceaux, False)
+    assert encoder(codes, morceaux, True) == scalaire
+    assert encoder(codes, morceaux, None) == scalaire
+
+@pytest.mark.parametrize("graine", range(5))
+def test_codes_longs(graine):
+    generateur = random.Random(graine)
+    longueurs = longueurs_peigne(LONGUEUR_MAX_VECTORISE)
+    assert max(longueurs.values()) == LONGUEUR_MAX_VECTORISE
+    codes = codes_canoniques(longueurs)
+    donnees = bytes(generateur.choices(range(len(longueurs)), k=50000))
+    morceaux = decouper(donnees, generateur)
+    assert encoder(codes, morceaux, True) == encoder(codes, morceaux, False)
+
+def test_codes_trop_longs():
+    codes = codes_canoniques(longueurs_peigne(LONGUEUR_MAX_VECTORISE + 1))
+    with pytest.raises(ValueError):
+        Encodeur(codes, None, vectorise=True)
+    donnees = bytes(random.Random(0).choices(range(len(codes)), k=20000))
+    assert encoder(codes, [donnees], None) == encoder(codes, [donnees], False)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests du décodage: un flux tronqué, même de quelques octets, doit lever DecodageError
+"""
+
+import random
+import pytest
+from huffman.blocs import TAILLE_EN_TETE_BLOC, compresser_bloc, decompresser_bloc
+from huffman.decodage import DecodageError
+from huffman.dictionnaire import TableEntrainee
+from huffman.huffman import FormatHuffmanError
+from huffman.memoire import compresser_octets, decompresser_octets
+
+DONNEES = bytes(random.Random(0).choices(b"azertyuiop \n", k=100000))
+COUPES = [1, 2, 5, 10, 40, 63, 64, 65, 70]
+
+@pytest.mark.parametrize("coupe", COUPES)
+def test_v2_tronque(coupe):
+    compresse = compresser_octets(DONNEES)
+    assert decompresser_octets(compresse) == DONNEES
+    with pytest.raises((DecodageError, FormatHuffmanError)):
+        decompresser_octets(compresse[:-coupe])
+
+@pytest.mark.parametrize("options", [{}, {"contexte": True}, {"nb_flux": 4},
+                                     {"decoupage": "16bits"}, {"decoupage": "mots"}],
+                         ids=["huffman", "contexte", "entrelace", "16bits", "mots"])
+@pytest.mark.parametrize("coupe", COUPES)
+def test_bloc_tronque(options, coupe):
+    enregistrement = compresser_bloc(DONNEES, **options)
+    type_bloc = enregistrement[0]
+    taille = int.from_bytes(enregistrement[1:5], "little")
+    charge = enregistrement[TAILLE_EN_TETE_BLOC:]
+    assert decompresser_bloc(type_bloc, taille, charge) == DONNEES
+    with pytest.raises((DecodageError, FormatHuffmanError)):
+        decompresser_bloc(type_bloc, taille, charge[:-coupe])
+
+@pytest.mark.parametrize("coupe", [1, 2, 5, 10])
+def test_message_tronque(coupe):
+    table = TableEntrainee.entrainer([DONNEES[i:i+200] for i in range(0, 20000, 200)])
+    message = table.compresser(DONNEES[:3000])
+    assert table.decompresser(message) == DONNEES[:3000]
+    with pytest.raises((DecodageError, FormatHuffmanError)):
+        table.decompresser(message[:-coupe])
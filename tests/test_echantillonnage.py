@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests de l'échantillonnage des statistiques (format v2 seulement)
+"""
+
+import io
+import random
+import pytest
+from huffman import huffman
+
+DONNEES = bytes(random.Random(0).choices(b"azertyuiop \n", k=200000))
+
+def test_aller_retour_echantillonne():
+    destination = io.BytesIO()
+    for _ in huffman.compresser(destination, io.BytesIO(DONNEES), echantillonnage=0.05):
+        pass
+    sortie = io.BytesIO()
+    for _ in huffman.decompresser(sortie, io.BytesIO(destination.getvalue())):
+        pass
+    assert sortie.getvalue() == DONNEES
+
+class SourceNonPositionnable(io.RawIOBase):
+    """Source lisible une seule fois, comme un tube"""
+
+    def __init__(self, donnees):
+        super().__init__()
+        self._flux = io.BytesIO(donnees)
+
+    def readable(self):
+        return True
+
+    def readinto(self, tampon):
+        return self._flux.readinto(tampon)
+
+@pytest.mark.parametrize("options", [{"nb_processus": 2}, {"taille_bloc": 1 << 16},
+                                     {"nb_flux": 4}, {"contexte": True},
+                                     {"decoupage": "mots"}, {"source": SourceNonPositionnable}],
+                         ids=["processus", "blocs", "flux", "contexte", "mots", "tube"])
+def test_echantillonnage_blocs(options):
+    #L'échantillonnage ne doit pas être ignoré silencieusement par le format par blocs
+    options = dict(options)
+    source = options.pop("source", io.BytesIO)(DONNEES)
+    destination = io.BytesIO()
+    with pytest.raises(ValueError):
+        for _ in huffman.compresser(destination, source, echantillonnage=0.05, **options):
+            pass
+    assert destination.getvalue() == b""
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests des en-têtes 64 bits (HUF1, HUF3, HUFL): allers-retours, détection automatique
+et fichiers creux de plus de 4 Gio
+"""
+
+import io
+import os
+import random
+import pytest
+from huffman import huffman
+from huffman.blocs import TAILLE_BLOC_MAX
+from huffman.memoire import Compresseur, compresser_octets, decompresser_octets
+
+CORPUS = [b"", b"a", b"hello world"*1000, random.Random(0).randbytes(5000)]
+
+def compresser(donnees: bytes, **options) -> bytes:
+    """Compresse donnees avec huffman.compresser et retourne le résultat"""
+    destination = io.BytesIO()
+    for _ in huffman.compresser(destination, io.BytesIO(donnees), **options):
+        pass
+    return destination.getvalue()
+
+def decompresser(compresse: bytes) -> bytes:
+    """Décompresse avec huffman.decompresser et retourne le résultat"""
+    destination = io.BytesIO()
+    for _ in huffman.decompresser(destination, io.BytesIO(compresse)):
+        pass
+    return destination.getvalue()
+
+@pytest.mark.parametrize("donnees", CORPUS, ids=["vide", "un", "texte", "aleatoire"])
+@pytest.mark.parametrize("version", [1, 2])
+def test_aller_retour_large(donnees, version):
+    compresse = compresser(donnees, version=version, en_tete_large=True)
+    attendus = {1: {"HUF1"}, 2: {"HUF3", "HUFL"}}[version]
+    assert compresse[:4].decode("ascii") in attendus
+    assert int.from_bytes(compresse[4:12], "little") == len(donnees)
+    assert decompresser(compresse) == donnees
+    if version == 2:
+        assert decompresser_octets(compresse) == donnees
+
+@pytest.mark.parametrize("donnees", CORPUS, ids=["vide", "un", "texte", "aleatoire"])
+def test_memoire_large(donnees):
+    compresse = compresser_octets(donnees, en_tete_large=True)
+    assert compresse[:4] in (b"HUF3", b"HUFL")
+    assert decompresser_octets(compresse) == donnees
+    assert decompresser(compresse) == donnees
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_detection_automatique(version):
+    #Sous 4 Gio, les en-têtes d'origine sont conservés; les deux sont relus
+    donnees = b"hello world"*1000
+    ordinaire = compresser(donnees, version=version)
+    assert ordinaire[:4] == {1: b"HUFF", 2: b"HUF2"}[version]
+    large = compresser(donnees, version=version, en_tete_large=True)
+    assert decompresser(ordinaire) == decompresser(large) == donnees
+
+def test_stocke_detection():
+    donnees = random.Random(1).randbytes(3000)
+    assert compresser(donnees)[:4] == b"HUFS"
+    assert compresser(donnees, en_tete_large=True)[:4] == b"HUFL"
+
+@pytest.mark.parametrize("taille_bloc", [TAILLE_BLOC_MAX+1, 8 << 30])
+def test_taille_bloc_max(taille_bloc):
+    #Les enregistrements de blocs gardent des tailles sur 4 octets
+    with pytest.raises(ValueError):
+        Compresseur(taille_bloc)
+    destination = io.BytesIO()
+    with pytest.raises(ValueError):
+        for _ in huffman.compresser(destination, io.BytesIO(b"abc"), taille_bloc=taille_bloc):
+            pass
+    assert destination.getvalue() == b""
+
+@pytest.mark.parametrize("options", [{"nb_processus": 2}, {"taille_bloc": 1 << 16},
+                                     {"nb_flux": 4}, {"contexte": True}],
+                         ids=["processus", "blocs", "flux", "contexte"])
+def test_en_tete_large_blocs(options):
+    destination = io.BytesIO()
+    with pytest.raises(ValueError):
+        for _ in huffman.compresser(destination, io.BytesIO(b"abc"), en_tete_large=True, **options):
+            pass
+    assert destination.getvalue() == b""
+
+TAILLE_CREUSE = huffman.LIMITE_EN_TETE + 12345
+
+@pytest.fixture
+def fichier_creux(tmpdir):
+    """Fichier creux de plus de 4 Gio, presque entièrement nul"""
+    nom = str(tmpdir.join("creux.bin"))
+    with open(nom, "wb") as fichier:
+        fichier.truncate(TAILLE_CREUSE)
+        for position in (0, 1 << 31, TAILLE_CREUSE - 3):
+            fichier.seek(position)
+            fichier.write(b"xyz")
+    if os.stat(nom).st_blocks*512 > 1 << 26:
+        pytest.skip("le système de fichiers ne gère pas les fichiers creux")
+    return nom
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_fichier_creux_en_tete(fichier_creux, version):
+    #Seul l'en-tête est écrit: le codage de 4 Gio serait trop long pour un test
+    destination = io.BytesIO()
+    with open(fichier_creux, "rb") as source:
+        etapes = huffman.compresser(destination, source, version=version, echantillonnage=0.001)
+        for etape in etapes:
+            if etape == "Ecriture des octets":
+                break
+        etapes.close()
+    en_tete = destination.getvalue()
+    assert en_tete[:4] == {1: b"HUF1", 2: b"HUF3"}[version]
+    assert int.from_bytes(en_tete[4:12], "little") == TAILLE_CREUSE
+
+class DestinationComptee(io.RawIOBase):
+    """Destination qui ne fait que compter les octets écrits"""
+
+    def __init__(self):
+        super().__init__()
+        self.taille = 0
+
+    def writable(self):
+        return True
+
+    def write(self, octets):
+        self.taille += len(octets)
+        return len(octets)
+
+def test_fichier_creux_stocke(tmpdir):
+    nom = str(tmpdir.join("creux.hufl"))
+    with open(nom, "wb") as fichier:
+        fichier.write(b"HUFL" + TAILLE_CREUSE.to_bytes(8, "little"))
+        fichier.truncate(12 + TAILLE_CREUSE)
+    if os.stat(nom).st_blocks*512 > 1 << 26:
+        pytest.skip("le système de fichiers ne gère pas les fichiers creux")
+    destination = DestinationComptee()
+    with open(nom, "rb") as source:
+        for _ in huffman.decompresser(destination, source):
+            pass
+    assert destination.taille == TAILLE_CREUSE
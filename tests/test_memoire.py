@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests du module memoire: décompression incrémentale par petits morceaux
+"""
+
+import random
+import pytest
+from huffman.memoire import Decompresseur, compresser_octets
+
+DONNEES = bytes(random.Random(0).choices(b"azertyuiop \n", k=200000))
+
+@pytest.mark.parametrize("coupe", [0, 1, 2, 3, 4, 5], ids=lambda coupe: "coupe%d" % coupe)
+def test_identifiant_coupe(coupe):
+    compresse = compresser_octets(DONNEES, taille_bloc=1 << 16)
+    decompresseur = Decompresseur()
+    assert decompresseur.decompresser(b"") == b""
+    assert decompresseur.enregistrements(compresse[:coupe]) == []
+    resultat = decompresseur.decompresser(compresse[coupe:])
+    assert resultat == DONNEES
+    assert decompresseur.fin
+
+def test_octet_par_octet():
+    compresse = compresser_octets(DONNEES[:5000], taille_bloc=1000)
+    decompresseur = Decompresseur()
+    resultat = b"".join(decompresseur.decompresser(compresse[i:i+1])
+                        for i in range(len(compresse)))
+    assert resultat == DONNEES[:5000]
+    assert decompresseur.fin